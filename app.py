@@ -1,65 +1,31 @@
+import time
+SCRIPT_STARTED = time.perf_counter()
+
 import streamlit as st
-from groq import Groq
-from langchain_groq import ChatGroq
-from crewai import Crew, Agent, Task
 import os
-from typing import List, Dict
+from typing import Any, Callable, List, Dict, Optional
+from consulting import example_data, create_clients, format_example, run_consulting_process, CREW_MODELS
+from routing import FAST_MODEL_NAME
+from similar_runs import SERVE_THRESHOLD, SimilarRunIndex, crew_key, facts_match, open_similar_runs
+from prompt_context import CONTEXT_TOKEN_BUDGET, count_tokens
+from tracing import metrics, span, start_trace
+from result_cache import ResultCache
+from jobs import Job, JobManager, DONE
 
 # Load API key from secrets
 serper_api_key = st.secrets["SERPER_API_KEY"]
 os.environ["SERPER_API_KEY"] = serper_api_key
 
+# Time budgets for rendering the page up to the point it is interactive (first run of a session / later reruns)
+COLD_START_BUDGET_MS = 1500
+RERUN_BUDGET_MS = 200
+
+# Maximum number of crew runs executing at the same time across all sessions
+MAX_CONCURRENT_JOBS = 4
+
 # Set page configuration
 st.set_page_config(page_title="effiweb solutions Consulting Tool", layout="wide")
 
-# Example agent data
-example_data = [
-    {
-        "name": "Tlaloc",
-        "backstory": "Tlaloc is a seasoned Digital Strategy Consultant with a passion for crafting innovative solutions for businesses of all sizes. With a background in marketing and technology, Tlaloc has helped numerous clients achieve their growth objectives through strategic digital initiatives.",
-        "role": "Digital Strategy Consultant",
-        "goal": "To craft an efficient digital strategy tailored for your business context, optimizing growth, customer engagement, and scaling opportunities based on the following context: {}.",
-        "task": "Design a tailored digital strategy for the provided business context, focusing on critical aspects such as online presence, scaling, and operational efficiency. Specific challenges provided by the client: {}.",
-        "output": """
-         1. Executive Summary
-         2. Business Context and Challenges
-         3. Key Initiatives
-         4. Actionable Steps
-         5. Budget Allocation
-         6. Expected Outcomes
-        """,
-    },
-    {
-        "name": "Arminius",
-        "backstory": "Arminius is a seasoned Data Scientist with a knack for uncovering actionable insights from complex datasets. With a background in machine learning and analytics, Arminius has helped businesses leverage their data to drive strategic decision-making and operational efficiency.",
-        "role": "Analytics & Automation Specialist",
-        "goal": "To integrate analytics and automation into the business model, ensuring data-driven decision-making and optimized customer engagement, focusing on the client's specific challenges: {}.",
-        "task": "Implement data-driven solutions for customer engagement and operational automation. Challenges and context provided by the client: {}.",
-        "output": """
-         1. Analytics Overview
-         2. Automation Recommendations
-         3. Key Metrics to Track
-         4. Integration Plan
-         5. Budget Overview
-         6. Expected Outcomes
-        """,
-    },
-    {
-        "name": "Thusnelda",
-        "backstory": "Thusnelda is a seasoned UX/UI Designer with a passion for creating intuitive and engaging user experiences. With a background in design and human-computer interaction, Thusnelda has helped businesses enhance their digital products and services through user-centric design principles.",
-        "role": "Marketing & Growth Specialist",
-        "goal": "To develop a high-impact digital marketing strategy to enhance growth, customer acquisition, and brand visibility, based on the business context provided: {}.",
-        "task": "Create a scalable digital marketing strategy with key focus areas such as SEO, social media engagement, and customer outreach. Client challenges and context: {}.",
-        "output": """
-         1. Marketing Strategy Overview
-         2. Focus on Growth Opportunities
-         3. Campaign Execution Plan
-         4. Budget and ROI Estimates
-         5. Key Growth Projections
-        """,
-    }
-]
-
 # Caching examples
 @st.cache_data
 def load_examples() -> List[Dict[str, str]]:
@@ -92,7 +58,7 @@ def setup_sidebar():
                 st.write(f"**Challenges:** {example['Challenges']}")
                 st.write(f"**Budget:** {example['Budget']}")
                 if st.button(f"Use Example {i}", key=f"use_example_{i}"):
-                    st.session_state['business_context'] = f"Business: {example['Business']}\nChallenges: {example['Challenges']}\nBudget: {example['Budget']}"
+                    st.session_state['business_context'] = format_example(example)
 
         with st.expander("Contact", expanded=True):
             st.write("For inquiries: [effiwebsolutions@holaivan.tech](mailto:effiwebsolutions@holaivan.tech)")
@@ -115,11 +81,55 @@ def setup_sidebar():
             A: Start by prioritizing the recommendations based on your immediate needs and resources. Create an action plan with specific timelines and responsible team members for each task.
             """)
 
-# Initialize Groq client
+# Initialize Groq client (GROQ_BASE_URL optionally points it at another OpenAI-compatible endpoint)
 @st.cache_resource
 def init_groq_client():
      groq_api_key = st.secrets["GROQ_API_KEY"]
-     return Groq(api_key=groq_api_key), ChatGroq(api_key=groq_api_key, model="groq/llama-3.1-70b-versatile")
+     return create_clients(groq_api_key, base_url=st.secrets.get("GROQ_BASE_URL"))
+
+# Fast model for drafts and tool use; the client's model writes the final sections (see routing.py)
+@st.cache_resource
+def init_fast_llm():
+     groq_api_key = st.secrets["GROQ_API_KEY"]
+     return create_clients(groq_api_key, model=FAST_MODEL_NAME, base_url=st.secrets.get("GROQ_BASE_URL"))[1]
+
+# Shared on-disk cache of finished runs
+@st.cache_resource
+def init_result_cache() -> ResultCache:
+    return ResultCache()
+
+# Process-wide worker pool for crew runs, shared by all sessions
+@st.cache_resource
+def init_job_manager() -> JobManager:
+    return JobManager(max_workers=MAX_CONCURRENT_JOBS)
+
+# Optional web search for the agents, shared through one search layer per run. Off unless the
+# AGENT_WEB_SEARCH secret asks for it: "serper" searches with Serper (paid per query), "stub"
+# returns canned results for load tests.
+@st.cache_resource
+def init_web_search() -> Optional[Callable[[str], str]]:
+    from search_cache import tool_backend
+
+    backend = st.secrets.get("AGENT_WEB_SEARCH", "off")
+    if backend == "serper":
+        from crewai_tools import SerperDevTool
+        return tool_backend(SerperDevTool())
+    if backend == "stub":
+        from benchmarks.stubs import StubSearchTool
+        return tool_backend(StubSearchTool())
+    return None
+
+# Search results kept across runs for a day
+@st.cache_resource
+def init_search_cache() -> ResultCache:
+    from search_cache import open_search_cache
+
+    return open_search_cache()
+
+# Index of past business contexts, to answer near-duplicate requests without a new run
+@st.cache_resource
+def init_similar_runs() -> Optional[SimilarRunIndex]:
+    return open_similar_runs()
 
 # Input validation
 def validate_input(business_context: str) -> bool:
@@ -129,33 +139,36 @@ def validate_input(business_context: str) -> bool:
     if len(business_context.split()) < 20:
         st.warning("Please provide more detailed information for better results.")
         return False
+    if count_tokens(business_context) > CONTEXT_TOKEN_BUDGET:
+        st.info("Your description is quite long, so it will be condensed before it is shared with the agents.")
     return True
 
-# Main function to run the consulting process
-def run_consulting_process(business_context: str, agent_data: List[Dict], client: Groq, llm: ChatGroq):
-    # Create agents and tasks based on the provided business context
-    agents = []
-    tasks = []
-    for data in agent_data:
-        agent = Agent(
-            role=data['role'],
-            goal=data['goal'].format(business_context),
-            backstory=data['backstory'],
-            verbose=False,
-            # allow_delegation=True,
-            # max_iter=4
-        )
-        task = Task(
-            description=data['task'].format(business_context),
-            expected_output=data['output'],
-            agent=agent,
-        )
-        agents.append(agent)
-        tasks.append(task)
-
-    my_crew = Crew(agents=agents, tasks=tasks)
-    results = my_crew.kickoff(inputs={"input": business_context})
-    return results
+# Run the crew and render each agent's report section as soon as that agent finishes
+def run_with_report(business_context: str, agent_data: List[Dict], on_event: Callable[[str, str, str], None],
+                    similar: Optional[SimilarRunIndex] = None, **kwargs) -> Dict[str, Any]:
+    from report import ReportBuilder
+
+    report = ReportBuilder(agent_data)
+
+    def forward(agent_name: str, kind: str, text: str = ""):
+        if kind == "finished":
+            report.add_section(agent_name, text)
+        on_event(agent_name, kind, text)
+
+    with start_trace("consulting_run") as trace:
+        results = run_consulting_process(business_context, agent_data, on_event=forward, **kwargs)
+        with span("report.build", "report"):
+            pdf = report.build().getvalue()
+        # Agents stopped by their deadline or a cancellation are missing from the results
+        finished = {result['name'] for result in results}
+        missing = [data['name'] for data in agent_data if data['name'] not in finished]
+        if similar is not None and results and not missing:
+            try:
+                with span("similar.add", "internal"):
+                    similar.add(business_context, crew_key(agent_data, CREW_MODELS), results)
+            except Exception:
+                pass  # e.g. the embedding model could not be loaded; the run itself succeeded (see the trace)
+    return {"results": results, "report": pdf, "trace": trace.to_dict(), "missing": missing}
 
 # Function to display results in a simpler format
 def display_results(results: List[Dict[str, str]]):
@@ -166,6 +179,125 @@ def display_results(results: List[Dict[str, str]]):
     else:
         st.warning("No results were generated. Please try again with more detailed input.")
 
+# One live placeholder per agent, updated while the crew is still running
+class LiveResults:
+    def __init__(self, agent_data: List[Dict]):
+        self.area = st.empty()
+        self.bodies = {}
+        with self.area.container():
+            for i, data in enumerate(agent_data, 1):
+                st.subheader(f"Strategy {i}")
+                self.bodies[data['name']] = st.empty()
+                self.bodies[data['name']].caption(f"{data['role']} is waiting to start...")
+
+    def update(self, events: List[Dict[str, Any]]):
+        for event in events:
+            body = self.bodies.get(event['agent'])
+            if body is None:
+                continue
+            if event['type'] == "started":
+                body.info(f"{event['agent']} is working...")
+            elif event['type'] == "step":
+                body.info(f"{event['agent']} is working...\n\n{event['text']}")
+            elif event['type'] == "finished":
+                body.write(event['text'])
+            elif event['type'] == "failed":
+                body.error(f"{event['agent']} could not finish: {event['text']}")
+            elif event['type'] == "stopped":
+                body.warning(f"{event['agent']} was stopped: {event['text']}")
+
+    # Remove the live view once the final results are rendered
+    def clear(self):
+        self.area.empty()
+
+# Follow a job's progress in the page until it finishes, then render its results
+def show_job(job: Job, agent_data: List[Dict]):
+    # Clicking reruns the script, which cancels the job here; agents that already finished are kept
+    if not job.finished and st.button("Stop and keep finished sections", key=f"stop_{job.id}"):
+        job.cancel()
+    live = LiveResults(agent_data)
+    seen = 0
+    while True:
+        job.touch()  # tells the job manager this session is still waiting
+        finished = job.finished
+        events = job.snapshot()
+        live.update(events[seen:])
+        seen = len(events)
+        if finished:
+            break
+        time.sleep(0.2)
+    live.clear()
+    if job.status == DONE:
+        from report import REPORT_FILE_NAME
+
+        if job.result['missing']:
+            st.warning(f"Not every agent finished ({', '.join(job.result['missing'])} did not), "
+                       "so the results and the report only contain the finished sections.")
+        display_results(job.result['results'])
+        if job.result['results']:
+            st.download_button("Download Detailed Report", job.result['report'], file_name=REPORT_FILE_NAME,
+                               mime="application/pdf")
+    else:
+        st.error(f"The consulting process failed: {job.error}")
+
+# Show an earlier run's answer; its PDF is built once here, not on every rerun that displays it
+def accept_previous_run(match: Dict[str, Any], agent_data: List[Dict]):
+    from report import build_report
+
+    report = build_report(agent_data, {result['name']: result['output'] for result in match['results']})
+    st.session_state['previous_run'] = {**match, "report": report.getvalue()}
+
+# Results of an earlier run with a near-identical business context
+def show_previous_run(match: Dict[str, Any]):
+    from report import REPORT_FILE_NAME
+
+    st.caption(f"Answered from a previous, {match['similarity']:.0%} similar request. "
+               "Tick 'Ignore cached results' to run the agents again.")
+    display_results(match['results'])
+    st.download_button("Download Detailed Report", match['report'], file_name=REPORT_FILE_NAME, mime="application/pdf")
+
+# Queue a crew run for this session and remember its ID across reruns and refreshes
+def start_job(business_context: str, use_cache: bool) -> Job:
+    jobs = init_job_manager()
+    client, llm = init_groq_client()  # Initialize Groq client and LLM
+    job_id = jobs.submit(run_with_report, business_context, example_data, client=client, llm=llm,
+                         fast_llm=init_fast_llm(), cache=init_result_cache(), use_cache=use_cache,
+                         similar=init_similar_runs(), search=init_web_search(),
+                         search_cache=init_search_cache())  # Queue the process
+    st.session_state['job_id'] = job_id
+    st.query_params['job'] = job_id
+    st.session_state.pop('previous_run', None)
+    return jobs.get(job_id)
+
+# Remember how long this script run took to become interactive
+def record_render_time():
+    elapsed_ms = round((time.perf_counter() - SCRIPT_STARTED) * 1000, 1)
+    timings = st.session_state.setdefault('render_ms', [])
+    timings.append(elapsed_ms)
+    del timings[1:-50]  # keep the cold start and the most recent reruns
+
+# Timings, call counts and token usage for the last run and the whole process (open the app with ?debug=1)
+def show_debug_panel(job: Optional[Job]):
+    with st.sidebar.expander("Debug", expanded=False):
+        if job is not None and job.status == DONE:
+            st.write("**Last run**")
+            st.json(job.result['trace']['summary'])
+        st.write("**All runs in this process**")
+        st.json(metrics.snapshot())
+        st.write("**Render time (ms)**")
+        timings = st.session_state.get('render_ms', [])
+        if timings:
+            st.json({"cold_start": timings[0], "last_rerun": timings[-1] if len(timings) > 1 else None,
+                     "budgets": {"cold_start": COLD_START_BUDGET_MS, "rerun": RERUN_BUDGET_MS}})
+            if timings[0] > COLD_START_BUDGET_MS or (len(timings) > 1 and timings[-1] > RERUN_BUDGET_MS):
+                st.warning("Rendering is over budget.")
+        st.write("**Result cache**")
+        st.json(init_result_cache().stats())
+        st.write("**Search cache**")
+        st.json(init_search_cache().stats())
+        st.write("**Jobs**")
+        st.json(init_job_manager().stats())
+
 # Main app logic
 def main():
     st.title("effiweb solutions Consulting Tool")
@@ -176,15 +308,68 @@ def main():
                                     value=st.session_state.get('business_context', ''), 
                                     help='The more details you provide, the better the agents can assist you.')
 
+    # Allow forcing a fresh run instead of reusing a cached result
+    use_cache = not st.checkbox('Ignore cached results', value=False,
+                                help='Run the agents again even if this request was answered before.')
+
+    # The job ID lives in the session and the URL, so reruns and page refreshes reattach to the same run
+    jobs = init_job_manager()
+    job_id = st.session_state.get('job_id') or st.query_params.get('job')
+    job = jobs.get(job_id)
+
     # Trigger the consulting process on button click
     if st.button('Start Consulting Process'):
-        if validate_input(business_context):  # Ensure the input is valid
-            with st.spinner('Processing your request...'):
-                client, llm = init_groq_client()  # Initialize Groq client and LLM
-                results = run_consulting_process(business_context, example_data, client, llm)  # Run the process
+        # A new request replaces whatever earlier answer or offer is on screen
+        st.session_state.pop('similar_offer', None)
+        st.session_state.pop('previous_run', None)
+        if job is not None and not job.finished:
+            st.info("Your previous request is still being processed.")
+        elif validate_input(business_context):  # Ensure the input is valid
+            # Near-duplicates of earlier requests are answered from the index instead of a new run
+            match = None
+            similar = init_similar_runs()
+            if use_cache and similar is not None:
+                try:
+                    match = similar.lookup(business_context, crew_key(example_data, CREW_MODELS))
+                except Exception:
+                    match = None  # without the index (e.g. no embedding model), run the crew
+            # Only served without asking when the budget and every figure are the same as before
+            if (match is not None and match['similarity'] >= SERVE_THRESHOLD
+                    and facts_match(business_context, match['context'])):
+                accept_previous_run(match, example_data)
+                job = None
+            elif match is not None:
+                st.session_state['similar_offer'] = {"match": match, "context": business_context}
+            else:
+                job = start_job(business_context, use_cache)
+
+    # Offer the answer to a similar (but not near-identical) earlier request
+    offer = st.session_state.get('similar_offer')
+    if offer is not None:
+        st.info(f"A similar request was answered before ({offer['match']['similarity']:.0%} similar).")
+        use_previous, run_anyway = st.columns(2)
+        if use_previous.button("Show the previous answer"):
+            st.session_state.pop('similar_offer')
+            accept_previous_run(offer['match'], example_data)
+            st.rerun()
+        if run_anyway.button("Run the agents anyway"):
+            if job is not None and not job.finished:
+                st.info("Your previous request is still being processed.")
+            else:
+                st.session_state.pop('similar_offer')
+                start_job(offer['context'], use_cache)
+                st.rerun()
+
+    record_render_time()
+
+    if 'previous_run' in st.session_state:
+        show_previous_run(st.session_state['previous_run'])
+    elif job is not None:
+        with st.spinner('Processing your request...'):
+            show_job(job, example_data)  # Display results in a structured format
 
-                if results:
-                    display_results(results)  # Display results in a structured format
+    if st.query_params.get('debug') == "1":
+        show_debug_panel(job)
 
     st.markdown("---")
     st.write("Questions? Contact: [effiwebsolutions@holaivan.tech](mailto:effiwebsolutions@holaivan.tech)")
@@ -0,0 +1,173 @@
+import argparse
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
+import csv
+import hashlib
+import json
+import os
+import sys
+import time
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from cancellation import CancelToken
+from consulting import example_data, create_clients, format_example, run_consulting_process, MAX_CONCURRENT_TASKS, CREW_MODELS
+from result_cache import ResultCache
+from routing import FAST_MODEL_NAME
+from similar_runs import SERVE_THRESHOLD, SimilarRunIndex, crew_key, facts_match, open_similar_runs
+from scheduler import crew_spec_from_row
+
+DEFAULT_CONCURRENCY = 4
+
+
+# Turn one input record into (business context, agent specs); accepts an explicit
+# "context", the Business/Challenges/Budget examples or an examples.csv use case row
+def record_to_job(record: Dict[str, str]) -> Tuple[str, List[Dict]]:
+    if record.get("context"):
+        return record["context"], example_data
+    if record.get("Business"):
+        return format_example({"Budget": "", "Challenges": "", **record}), example_data
+    if record.get("Use Case"):
+        return f"Use case: {record['Use Case']}", crew_spec_from_row(record)
+    raise ValueError("Record needs a 'context', 'Business' or 'Use Case' field.")
+
+
+# Records keep their own "id" if they have one, otherwise the ID is derived from their content
+def record_id(record: Dict[str, str]) -> str:
+    if record.get("id"):
+        return str(record["id"])
+    payload = json.dumps(record, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+# Read records from a .csv or .jsonl file
+def read_records(path: str) -> Iterator[Dict[str, str]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        if path.endswith(".csv"):
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+# IDs already written successfully to the output file, so an interrupted batch can resume
+def completed_ids(path: str) -> Set[str]:
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                continue  # a line cut off by the interruption
+            if row.get("status") == "ok":
+                done.add(row["id"])
+    return done
+
+
+def run_batch(input_path: str, output_path: str, groq_api_key: str, concurrency: int = DEFAULT_CONCURRENCY,
+              task_concurrency: int = MAX_CONCURRENT_TASKS, cache: Optional[ResultCache] = None,
+              similar: Optional[SimilarRunIndex] = None) -> Dict[str, int]:
+    client, llm = create_clients(groq_api_key)
+    _, fast_llm = create_clients(groq_api_key, model=FAST_MODEL_NAME)
+    skip = completed_ids(output_path)
+    counts = {"ok": 0, "partial": 0, "error": 0, "skipped": 0}
+    stop = CancelToken(name="batch")
+
+    def run_one(job_id: str, record: Dict[str, str]) -> Dict:
+        started = time.time()
+        try:
+            business_context, agent_data = record_to_job(record)
+            crew = crew_key(agent_data, CREW_MODELS)
+            # Reworded duplicates of earlier leads are answered from the similar-runs index, but only when
+            # the budget and every figure match; otherwise the lead runs and the near-match is recorded
+            match = None
+            if similar is not None:
+                try:
+                    match = similar.lookup(business_context, crew, threshold=SERVE_THRESHOLD)
+                except Exception:
+                    pass  # without the index (e.g. no embedding model), run the crew
+            similar_to = {"similar_to": match["context"], "similarity": round(match["similarity"], 4),
+                          "served_from_similar": facts_match(business_context, match["context"])} if match else {}
+            if similar_to.get("served_from_similar"):
+                row = {"id": job_id, "status": "ok", "context": business_context, "results": match["results"],
+                       **similar_to}
+            else:
+                results = run_consulting_process(business_context, agent_data, client, llm,
+                                                 max_concurrency=task_concurrency, cache=cache, fast_llm=fast_llm,
+                                                 cancel=stop)
+                # Agents that ran out of time are missing; such records run again when the batch is resumed
+                finished = {result["name"] for result in results}
+                missing = [data["name"] for data in agent_data if data["name"] not in finished]
+                if missing:
+                    row = {"id": job_id, "status": "partial", "context": business_context, "results": results,
+                           "missing": missing, **similar_to}
+                else:
+                    if similar is not None:
+                        try:
+                            similar.add(business_context, crew, results)
+                        except Exception:
+                            pass  # the run succeeded; it just can't answer later leads
+                    row = {"id": job_id, "status": "ok", "context": business_context, "results": results,
+                           **similar_to}
+        except Exception as e:
+            row = {"id": job_id, "status": "error", "error": str(e)}
+        row["seconds"] = round(time.time() - started, 3)
+        return row
+
+    def write(out, row: Dict) -> None:
+        out.write(json.dumps(row, ensure_ascii=False) + "\n")
+        out.flush()
+        counts[row["status"]] += 1
+        print(f"[{row['status']}] {row['id']} ({row['seconds']}s)", file=sys.stderr)
+
+    # Results are appended as soon as each run finishes; only this thread writes the file. At most
+    # `concurrency` records are submitted at a time, so an interrupted batch leaves no queued runs
+    # behind, and the runs in flight are cancelled.
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    try:
+        with open(output_path, "a", encoding="utf-8") as out:
+            pending = set()
+            for record in read_records(input_path):
+                job_id = record_id(record)
+                if job_id in skip:
+                    counts["skipped"] += 1
+                    continue
+                skip.add(job_id)  # duplicate records in the input run once
+                if len(pending) >= concurrency:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        write(out, future.result())
+                pending.add(executor.submit(run_one, job_id, record))
+            for future in as_completed(pending):
+                write(out, future.result())
+    finally:
+        stop.cancel("The batch was interrupted.")
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return counts
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate consulting reports for many business contexts.")
+    parser.add_argument("input", help="CSV or JSONL file with 'context', Business/Challenges/Budget or 'Use Case' records")
+    parser.add_argument("output", help="JSONL file results are appended to; finished IDs are skipped on rerun")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY, help="crew runs at the same time")
+    parser.add_argument("--task-concurrency", type=int, default=MAX_CONCURRENT_TASKS, help="agent tasks at the same time within one run")
+    parser.add_argument("--no-cache", action="store_true", help="do not read or write the result and similar-run caches")
+    args = parser.parse_args(argv)
+
+    groq_api_key = os.environ.get("GROQ_API_KEY")
+    if not groq_api_key:
+        parser.error("GROQ_API_KEY must be set in the environment.")
+
+    counts = run_batch(args.input, args.output, groq_api_key, concurrency=args.concurrency,
+                       task_concurrency=args.task_concurrency, cache=None if args.no_cache else ResultCache(),
+                       similar=None if args.no_cache else open_similar_runs())
+    print(f"Done: {counts['ok']} ok, {counts['partial']} partial, {counts['error']} failed, "
+          f"{counts['skipped']} already completed", file=sys.stderr)
+    return 0 if counts["error"] == 0 and counts["partial"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
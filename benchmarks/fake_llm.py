@@ -0,0 +1,123 @@
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Dict, List, Optional
+
+# Deterministic stand-in for the Groq (OpenAI-compatible) chat completions API.
+# Answers in the Thought/Action/Final Answer format crewAI agents parse, with
+# configurable latency, completion token rate and injected errors.
+
+DEFAULT_LATENCY = 0.2        # seconds before the first token
+DEFAULT_TOKENS_PER_SECOND = 500.0
+DEFAULT_COMPLETION_TOKENS = 300
+
+
+class FakeLLMServer:
+    def __init__(self, latency: float = DEFAULT_LATENCY, tokens_per_second: float = DEFAULT_TOKENS_PER_SECOND,
+                 completion_tokens: int = DEFAULT_COMPLETION_TOKENS, error_rate: float = 0.0,
+                 rate_limit_rate: float = 0.0, seed: int = 0, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.requests = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer((host, port), self._handler())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "FakeLLMServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self) -> "FakeLLMServer":
+        return self.start()
+
+    def __exit__(self, *exc) -> None:
+        self.stop()
+
+    # Decide up front whether this request fails, so outcomes only depend on the seed and request order
+    def _next_outcome(self) -> Optional[int]:
+        with self._lock:
+            self.requests += 1
+            roll = self._random.random()
+            if roll < self.rate_limit_rate:
+                self.errors += 1
+                return 429
+            if roll < self.rate_limit_rate + self.error_rate:
+                self.errors += 1
+                return 500
+        return None
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+                outcome = server._next_outcome()
+                time.sleep(server.latency)
+                if outcome is not None:
+                    self._send(outcome, {"error": {"message": "injected error", "type": "fake"}},
+                               {"retry-after": "0"} if outcome == 429 else {})
+                    return
+                messages = body.get("messages", [])
+                content = fake_completion(messages, server.completion_tokens)
+                completion_tokens = len(content.split())
+                time.sleep(completion_tokens / server.tokens_per_second)
+                prompt_tokens = sum(len(str(m.get("content", "")).split()) for m in messages)
+                self._send(200, {
+                    "id": f"chatcmpl-{uuid.uuid4().hex[:12]}",
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": body.get("model", "fake"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": content}}],
+                    "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                              "total_tokens": prompt_tokens + completion_tokens},
+                })
+
+            def _send(self, status: int, payload: Dict, headers: Optional[Dict[str, str]] = None):
+                data = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+        return Handler
+
+
+# Use the first available tool once, then answer with the requested sections
+def fake_completion(messages: List[Dict], completion_tokens: int) -> str:
+    prompt = "\n".join(str(m.get("content", "")) for m in messages)
+    tools = re.findall(r"Tool Name: ([^\n]+)", prompt)
+    if tools and "Observation:" not in prompt:
+        return (f"Thought: I should research this first.\nAction: {tools[0].strip()}\n"
+                f"Action Input: {json.dumps({'search_query': 'business context'})}")
+    sections = re.findall(r"^\s*\d+\.\s+(.+)$", prompt, re.MULTILINE)[-6:] or ["Summary"]
+    filler = " ".join(["insight"] * max(1, completion_tokens // max(1, len(sections))))
+    answer = "\n\n".join(f"## {section.strip()}\n{filler}" for section in sections)
+    return f"Thought: I now can give a great answer\nFinal Answer: {answer}"
@@ -0,0 +1,190 @@
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.run import summarize_ms
+from consulting import example_data
+from rate_limit import get_rate_limiter
+
+# Load test of app.py: N simulated browser sessions at a time, each picking a sidebar example,
+# submitting it and waiting for the crew's results, against the local stand-in LLM:
+#
+#   python -m benchmarks.load --levels 1,2,4,8 --output load.json
+#   python -m benchmarks.load --levels 1,2,4,8 --compare load.json
+#
+# Every level reports throughput, latency percentiles, error rate and process memory growth;
+# together they form the saturation curve of one app process.
+
+DEFAULT_LEVELS = "1,2,4,8"
+# A level saturates the app once throughput grows by less than this share over the previous level
+SATURATION_GAIN = 0.10
+START_BUTTON = "Start Consulting Process"
+
+
+# Resident memory of this process in MB (all sessions and jobs share it, as in a real deployment)
+def rss_mb() -> float:
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 2 ** 20 if sys.platform == "darwin" else peak / 2 ** 10
+
+
+# One user: open the page, pick an example, make it unique and wait for the results of each request
+def simulate_session(app: str, base_url: str, web_search: str, session: int, requests: int,
+                     timeout: float) -> List[Dict[str, Any]]:
+    at = AppTest.from_file(app, default_timeout=timeout)
+    at.secrets["SERPER_API_KEY"] = "load-test"
+    at.secrets["GROQ_API_KEY"] = "load-test"
+    at.secrets["GROQ_BASE_URL"] = base_url
+    at.secrets["AGENT_WEB_SEARCH"] = web_search
+
+    outcomes = []
+    started = time.perf_counter()
+    at.run()
+    first_paint_ms = (time.perf_counter() - started) * 1000
+    for request in range(requests):
+        outcome = {"session": session, "request": request, "first_paint_ms": first_paint_ms if request == 0 else None}
+        try:
+            at.sidebar.button(key=f"use_example_{(session + request) % 3 + 1}").click().run()
+            # Unique contexts, so neither the result cache nor the similar-runs index answers
+            at.text_area[0].input(at.text_area[0].value + f"\nLoad test session {session}, request {request}.")
+            at.checkbox[0].check()
+            started = time.perf_counter()
+            next(button for button in at.button if button.label == START_BUTTON).click().run()
+            outcome["latency_ms"] = (time.perf_counter() - started) * 1000
+            strategies = [header for header in at.subheader if header.value.startswith("Strategy ")]
+            if at.exception or at.error:
+                outcome["error"] = str((at.exception or at.error)[0].value)
+            elif any("Not every agent finished" in warning.value for warning in at.warning):
+                outcome["error"] = "partial results"
+            elif len(strategies) != len(example_data):
+                outcome["error"] = f"{len(strategies)} of {len(example_data)} sections shown"
+        except Exception as e:  # a timed out script run, or a page that did not render as expected
+            outcome.setdefault("latency_ms", None)
+            outcome["error"] = f"{type(e).__name__}: {e}"
+        outcomes.append(outcome)
+    return outcomes
+
+
+# Run `sessions` users at the same time and summarise their requests
+def run_level(app: str, base_url: str, web_search: str, sessions: int, requests: int, timeout: float) -> Dict[str, Any]:
+    memory_before = rss_mb()
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=sessions, thread_name_prefix="load-session") as executor:
+        futures = [executor.submit(simulate_session, app, base_url, web_search, i, requests, timeout) for i in range(sessions)]
+        outcomes = [outcome for future in futures for outcome in future.result()]
+    seconds = time.perf_counter() - started
+    memory_after = rss_mb()
+
+    ok = [o for o in outcomes if "error" not in o]
+    errors = [o["error"] for o in outcomes if "error" in o]
+    return {
+        "sessions": sessions,
+        "requests": len(outcomes),
+        "seconds": round(seconds, 3),
+        "requests_per_second": round(len(ok) / seconds, 3),
+        "latency_ms": summarize_ms([o["latency_ms"] for o in ok]),
+        "first_paint_ms": summarize_ms([o["first_paint_ms"] for o in outcomes if o["first_paint_ms"] is not None]),
+        "error_rate": round(len(errors) / len(outcomes), 3) if outcomes else 0.0,
+        "errors": sorted(set(errors))[:5],
+        "rss_mb": {"before": round(memory_before, 1), "after": round(memory_after, 1),
+                   "growth": round(memory_after - memory_before, 1)},
+    }
+
+
+# First level whose throughput barely improves on the previous one (or that starts failing)
+def saturation_point(curve: List[Dict[str, Any]], max_error_rate: float) -> Optional[int]:
+    for previous, level in zip(curve, curve[1:]):
+        gain = level["requests_per_second"] / previous["requests_per_second"] - 1 if previous["requests_per_second"] else 0
+        if gain < SATURATION_GAIN or level["error_rate"] > max_error_rate:
+            return level["sessions"]
+    return None
+
+
+# Throughput and p95 latency of this run relative to an earlier report, per concurrency level
+def compare(curve: List[Dict[str, Any]], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    previous = {level["sessions"]: level for level in baseline["curve"]}
+    rows = []
+    for level in curve:
+        old = previous.get(level["sessions"])
+        if old is None:
+            continue
+        rows.append({
+            "sessions": level["sessions"],
+            "throughput_ratio": round(level["requests_per_second"] / old["requests_per_second"], 3)
+            if old["requests_per_second"] else None,
+            "p95_latency_ratio": round(level["latency_ms"]["p95"] / old["latency_ms"]["p95"], 3)
+            if old["latency_ms"]["p95"] else None,
+            "error_rate_change": round(level["error_rate"] - old["error_rate"], 3),
+        })
+    return rows
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Load test app.py with concurrent simulated sessions.")
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--levels", default=DEFAULT_LEVELS, help="comma-separated numbers of concurrent sessions")
+    parser.add_argument("--requests", type=int, default=2, help="requests per session at each level")
+    parser.add_argument("--timeout", type=float, default=300.0, help="seconds one script run may take")
+    parser.add_argument("--latency", type=float, default=0.2, help="stand-in LLM seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0, help="stand-in LLM completion speed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of LLM requests failing with HTTP 500")
+    parser.add_argument("--max-error-rate", type=float, default=0.05, help="error rate counted as saturated")
+    parser.add_argument("--web-search", choices=["stub", "off"], default="stub",
+                        help="agent web search in the app: canned results, or none (Serper is never called)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="write the JSON report here as well")
+    parser.add_argument("--compare", help="earlier JSON report to compare the curve against")
+    args = parser.parse_args(argv)
+
+    app = os.path.abspath(args.app)
+    sys.path.insert(0, os.path.dirname(app))  # the app's modules stay importable from the scratch directory
+    levels = [int(level) for level in args.levels.split(",")]
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+    # The stand-in has no provider limits; keep the limiter from capping throughput
+    get_rate_limiter().configure(requests_per_minute=1_000_000, tokens_per_minute=1_000_000_000)
+
+    # Caches, traces and the Chroma store go to a scratch directory, so every load test starts cold
+    workdir = os.getcwd()
+    with tempfile.TemporaryDirectory() as scratch, \
+            FakeLLMServer(latency=args.latency, tokens_per_second=args.tokens_per_second,
+                          error_rate=args.error_rate, seed=args.seed) as server:
+        os.chdir(scratch)
+        try:
+            curve = []
+            for sessions in levels:
+                curve.append(run_level(app, server.base_url, args.web_search, sessions, args.requests, args.timeout))
+                print(json.dumps(curve[-1]), file=sys.stderr)
+        finally:
+            os.chdir(workdir)
+        llm_requests = server.requests
+
+    report = {"config": vars(args), "curve": curve, "saturated_at_sessions": saturation_point(curve, args.max_error_rate),
+              "llm_requests": llm_requests}
+    if baseline is not None:
+        report["compared_to"] = {"file": args.compare, "levels": compare(curve, baseline)}
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    return 0 if all(level["error_rate"] <= args.max_error_rate for level in curve) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
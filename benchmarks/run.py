@@ -0,0 +1,211 @@
+import argparse
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Dict, List, Optional
+
+from benchmarks.fake_llm import FakeLLMServer
+from benchmarks.stubs import StubSearchTool
+from consulting import example_data, create_clients, format_example, run_consulting_process, MAX_CONCURRENT_TASKS
+from rate_limit import get_rate_limiter
+from report import build_report
+from result_cache import ResultCache
+from routing import FAST_MODEL_NAME, ROUTING_CHOICES
+from scheduler import load_crew_specs
+from search_cache import tool_backend
+from tracing import percentile, start_trace
+
+# Offline benchmark of the crew pipeline against a local stand-in LLM and stubbed search:
+#
+#   python -m benchmarks.run --quick --output bench.json
+#
+# Every number comes from the traces the pipeline records, so scheduling, caching,
+# rate limiting and report generation regressions show up per stage.
+
+BENCH_CONTEXTS = [
+    {"Business": "Sweet Creations: An online bakery specializing in custom cakes.",
+     "Challenges": "Limited delivery operations and basic digital marketing.", "Budget": "€2,000"},
+    {"Business": "Tranquil Yoga: A small yoga studio offering virtual and in-person classes.",
+     "Challenges": "Limited customer base and manual booking system.", "Budget": "$1,500"},
+    {"Business": "Money Talks: A solopreneur running a podcast on financial literacy.",
+     "Challenges": "Limited monetization and audience engagement.", "Budget": "MXN 10,000"},
+]
+
+
+def summarize_ms(values: List[float]) -> Dict[str, float]:
+    return {"p50": round(percentile(values, 50), 1), "p95": round(percentile(values, 95), 1),
+            "mean": round(statistics.mean(values), 1) if values else 0.0}
+
+
+# Time spent per span kind, plus crewAI's own overhead per agent (agent time not spent waiting on the LLM)
+def stage_breakdown(trace: Dict[str, Any]) -> Dict[str, float]:
+    stages = defaultdict(float)
+    agent_ms = defaultdict(float)
+    llm_ms = defaultdict(float)
+    by_id = {span["id"]: span for span in trace["spans"]}
+    for span in trace["spans"]:
+        stages[span["kind"]] += span["duration_ms"]
+        owner = span
+        while owner is not None and owner["kind"] != "agent":
+            owner = by_id.get(owner["parent_id"])
+        if owner is None:
+            continue
+        if span["kind"] == "agent":
+            agent_ms[span["id"]] += span["duration_ms"]
+        elif span["kind"] == "llm":
+            llm_ms[owner["id"]] += span["duration_ms"]
+            stages["rate_limit_wait"] += span["attrs"].get("rate_limit_wait_ms", 0.0)
+    stages["agent_overhead"] = sum(agent_ms[key] - llm_ms[key] for key in agent_ms)
+    stages.pop("run", None)
+    return {kind: round(ms, 1) for kind, ms in stages.items()}
+
+
+def run_traced(business_context: str, agent_data: List[Dict], **kwargs) -> Dict[str, Any]:
+    started = time.perf_counter()
+    with start_trace("benchmark_run") as trace:
+        results = run_consulting_process(business_context, agent_data, **kwargs)
+    return {"wall_ms": (time.perf_counter() - started) * 1000, "trace": trace.to_dict(), "results": results}
+
+
+# Latency of one crew, run `repeat` times without the result cache
+def bench_crew(name: str, agent_data: List[Dict], repeat: int, **kwargs) -> Dict[str, Any]:
+    walls, stages, tokens, llm_calls, failures = [], defaultdict(list), [], [], 0
+    for i in range(repeat):
+        context = format_example(BENCH_CONTEXTS[i % len(BENCH_CONTEXTS)])
+        try:
+            run = run_traced(context, agent_data, **kwargs)
+        except Exception:
+            failures += 1
+            continue
+        walls.append(run["wall_ms"])
+        totals = run["trace"]["summary"]["totals"]
+        tokens.append(totals["tokens"])
+        llm_calls.append(totals["llm_calls"])
+        for kind, ms in stage_breakdown(run["trace"]).items():
+            stages[kind].append(ms)
+    return {
+        "name": name,
+        "agents": len(agent_data),
+        "runs": len(walls),
+        "failures": failures,
+        "wall_ms": summarize_ms(walls),
+        "stages_ms": {kind: round(statistics.mean(values), 1) for kind, values in sorted(stages.items())},
+        "llm_calls_per_run": round(statistics.mean(llm_calls), 1) if llm_calls else 0,
+        "tokens_per_run": round(statistics.mean(tokens), 1) if tokens else 0,
+    }
+
+
+# Completed runs per second with `concurrency` runs in flight
+def bench_throughput(runs: int, concurrency: int, **kwargs) -> Dict[str, Any]:
+    contexts = [format_example(BENCH_CONTEXTS[i % len(BENCH_CONTEXTS)]) + f"\nLead #{i}" for i in range(runs)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        outcomes = list(executor.map(lambda context: _succeeds(context, **kwargs), contexts))
+    seconds = time.perf_counter() - started
+    return {"runs": runs, "concurrency": concurrency, "failures": outcomes.count(False),
+            "seconds": round(seconds, 3), "runs_per_second": round(runs / seconds, 3)}
+
+
+def _succeeds(context: str, **kwargs) -> bool:
+    try:
+        run_consulting_process(context, example_data, **kwargs)
+        return True
+    except Exception:
+        return False
+
+
+# Cold run against a fresh result cache, then the repeated (cached) run
+def bench_cache(**kwargs) -> Dict[str, Any]:
+    context = format_example(BENCH_CONTEXTS[0])
+    with tempfile.TemporaryDirectory() as directory:
+        cache = ResultCache(os.path.join(directory, "bench.sqlite3"))
+        cold = run_traced(context, example_data, cache=cache, **kwargs)
+        warm = run_traced(context, example_data, cache=cache, **kwargs)
+    return {"cold_ms": round(cold["wall_ms"], 1), "cached_ms": round(warm["wall_ms"], 1)}
+
+
+def bench_report(results: List[Dict[str, str]], repeat: int) -> Dict[str, Any]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        build_report(example_data, {result["name"]: result["output"] for result in results})
+        timings.append((time.perf_counter() - started) * 1000)
+    return {"build_ms": summarize_ms(timings)}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Offline benchmarks for the consulting crew pipeline.")
+    parser.add_argument("--latency", type=float, default=0.2, help="stand-in LLM seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=500.0, help="stand-in LLM completion speed")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with HTTP 500")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="share of requests failing with HTTP 429")
+    parser.add_argument("--search-delay", type=float, default=0.1, help="seconds per stubbed search call")
+    parser.add_argument("--repeat", type=int, default=3, help="runs per crew")
+    parser.add_argument("--concurrency", type=int, default=4, help="runs in flight for the throughput benchmark")
+    parser.add_argument("--task-concurrency", type=int, default=MAX_CONCURRENT_TASKS)
+    parser.add_argument("--no-routing", action="store_true", help="run every agent step on the large model")
+    parser.add_argument("--routing", choices=ROUTING_CHOICES, help="override every agent's routing in the per-crew runs")
+    parser.add_argument("--no-shared-search", action="store_true",
+                        help="give each agent the search tool directly instead of the per-run shared search layer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--quick", action="store_true", help="one run per crew, only the 2, 7 and 10 agent crews")
+    parser.add_argument("--output", help="write the JSON report here as well")
+    args = parser.parse_args(argv)
+
+    random.seed(args.seed)
+    repeat = 1 if args.quick else args.repeat
+    # The stand-in has no provider limits; keep the limiter from skewing the numbers
+    get_rate_limiter().configure(requests_per_minute=1_000_000, tokens_per_minute=1_000_000_000)
+
+    with FakeLLMServer(latency=args.latency, tokens_per_second=args.tokens_per_second, error_rate=args.error_rate,
+                       rate_limit_rate=args.rate_limit_rate, seed=args.seed) as server:
+        client, llm = create_clients("fake-key", base_url=server.base_url)
+        _, fast_llm = create_clients("fake-key", model=FAST_MODEL_NAME, base_url=server.base_url)
+        search = StubSearchTool(delay=args.search_delay)
+        kwargs = {"client": client, "llm": llm, "max_concurrency": args.task_concurrency}
+        if args.no_shared_search:
+            kwargs["tools"] = [search]
+        else:
+            kwargs["search"] = tool_backend(search)
+        if not args.no_routing:
+            kwargs["fast_llm"] = fast_llm
+
+        crews = [("default", example_data)] + list(load_crew_specs().items())
+        if args.quick:
+            crews = [crews[0]] + [(name, specs) for name, specs in crews[1:] if len(specs) in (2, 7, 10)][:3]
+        if args.routing:
+            crews = [(name, [{**data, "routing": args.routing} for data in specs]) for name, specs in crews]
+
+        report = {"config": vars(args), "crews": [], "throughput": None, "cache": None, "report": None}
+        for name, agent_data in crews:
+            report["crews"].append(bench_crew(name, agent_data, repeat, **kwargs))
+            print(json.dumps(report["crews"][-1]), file=sys.stderr)
+
+        report["throughput"] = bench_throughput(runs=2 * args.concurrency, concurrency=args.concurrency, **kwargs)
+        report["cache"] = bench_cache(**kwargs)
+        sample = run_consulting_process(format_example(BENCH_CONTEXTS[0]), example_data, **kwargs)
+        report["report"] = bench_report(sample, repeat=max(3, repeat))
+        report["llm_requests"] = server.requests
+        report["search_calls"] = search.calls
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    # Numbers from runs that never reached the stand-in (e.g. requests sent to the real API) are meaningless
+    if report["llm_requests"] == 0:
+        print("No LLM request reached the stand-in server.", file=sys.stderr)
+        return 1
+    failures = sum(crew["failures"] for crew in report["crews"]) + report["throughput"]["failures"]
+    return 0 if failures == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,59 @@
+import argparse
+import json
+import statistics
+import sys
+import time
+from typing import List, Optional
+
+from streamlit.testing.v1 import AppTest
+
+# Cold-start and rerun timing of app.py, checked against time budgets:
+#
+#   python -m benchmarks.startup --reruns 10
+#
+# Also verifies the agent framework is not imported before a run is started.
+
+COLD_START_BUDGET_MS = 1500
+RERUN_BUDGET_MS = 200
+HEAVY_MODULES = ("crewai", "crewai_tools", "langchain_groq", "groq", "fpdf", "markdown2")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure app.py first paint and rerun times.")
+    parser.add_argument("--app", default="app.py")
+    parser.add_argument("--reruns", type=int, default=10)
+    parser.add_argument("--cold-budget-ms", type=float, default=COLD_START_BUDGET_MS)
+    parser.add_argument("--rerun-budget-ms", type=float, default=RERUN_BUDGET_MS)
+    args = parser.parse_args(argv)
+
+    at = AppTest.from_file(args.app, default_timeout=60)
+    at.secrets["SERPER_API_KEY"] = "benchmark"
+    at.secrets["GROQ_API_KEY"] = "benchmark"
+
+    started = time.perf_counter()
+    at.run()
+    cold_ms = (time.perf_counter() - started) * 1000
+    loaded = [name for name in HEAVY_MODULES if name in sys.modules]
+
+    # Reruns as triggered by typing into the text area or opening a sidebar example
+    rerun_ms = []
+    for i in range(args.reruns):
+        at.text_area[0].input(f"Rerun number {i}")
+        started = time.perf_counter()
+        at.run()
+        rerun_ms.append((time.perf_counter() - started) * 1000)
+
+    report = {
+        "cold_start_ms": round(cold_ms, 1),
+        "rerun_ms": {"median": round(statistics.median(rerun_ms), 1), "max": round(max(rerun_ms), 1)} if rerun_ms else None,
+        "heavy_modules_loaded_before_run": loaded,
+        "exceptions": [str(e.value) for e in at.exception],
+    }
+    print(json.dumps(report, indent=2))
+
+    over_budget = cold_ms > args.cold_budget_ms or (rerun_ms and statistics.median(rerun_ms) > args.rerun_budget_ms)
+    return 1 if over_budget or loaded or at.exception else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,24 @@
+import time
+from typing import Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+
+class SearchInput(BaseModel):
+    search_query: str = Field(..., description="Query to search the web for")
+
+
+# Offline replacement for SerperDevTool with a fixed delay and canned results
+class StubSearchTool(BaseTool):
+    name: str = "Search the internet"
+    description: str = "Searches the internet and returns the top results for a query."
+    args_schema: Type[BaseModel] = SearchInput
+    delay: float = 0.1
+    calls: int = 0
+
+    def _run(self, search_query: str) -> str:
+        self.calls += 1
+        time.sleep(self.delay)
+        return "\n".join(f"Title: Result {i} for {search_query}\nLink: https://example.com/{i}\n"
+                         f"Snippet: Canned snippet {i}." for i in range(1, 4))
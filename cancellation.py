@@ -0,0 +1,115 @@
+from contextlib import contextmanager
+import contextvars
+import threading
+import time
+from typing import Iterator, Optional
+
+
+# Raised inside a run once it has been cancelled or has run out of time
+class Cancelled(Exception):
+    pass
+
+
+class DeadlineExceeded(Cancelled):
+    pass
+
+
+# Cooperative cancellation with an optional deadline. Work checks the token at safe points
+# (between agent steps, before each LLM request); child tokens add a tighter deadline and
+# are cancelled together with their parent.
+class CancelToken:
+    def __init__(self, timeout_seconds: Optional[float] = None, parent: Optional["CancelToken"] = None,
+                 name: str = "run"):
+        self.name = name
+        self.parent = parent
+        self.deadline = time.monotonic() + timeout_seconds if timeout_seconds is not None else None
+        self.reason = None
+        self._event = threading.Event()
+        self._children = []
+        if parent is not None:
+            parent._children.append(self)
+
+    # Cancelling a token wakes everything waiting on it or on any of its children
+    def cancel(self, reason: str = "Cancelled") -> None:
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+            for child in list(self._children):
+                child.cancel(reason)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._event.is_set() or (self.parent is not None and self.parent.cancelled)
+
+    # Seconds until the nearest deadline of this token or its parents, or None without one
+    def remaining(self) -> Optional[float]:
+        remaining = self.deadline - time.monotonic() if self.deadline is not None else None
+        inherited = self.parent.remaining() if self.parent is not None else None
+        if remaining is None or inherited is None:
+            return remaining if inherited is None else inherited
+        return min(remaining, inherited)
+
+    def check(self) -> None:
+        if self.parent is not None:
+            self.parent.check()
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+        if self.deadline is not None and time.monotonic() >= self.deadline:
+            raise DeadlineExceeded(f"The {self.name} ran out of time.")
+
+    # Sleep for up to `seconds`, waking early once cancelled or out of time; True while work may continue
+    def wait(self, seconds: float) -> bool:
+        remaining = self.remaining()
+        if remaining is not None:
+            seconds = min(seconds, max(remaining, 0.0))
+        self._event.wait(seconds)
+        return self.stop_reason is None
+
+    # Why work under this token has to stop, or None while it may continue
+    @property
+    def stop_reason(self) -> Optional[str]:
+        try:
+            self.check()
+        except Cancelled as e:
+            return str(e)
+        return None
+
+    def child(self, timeout_seconds: Optional[float] = None, name: str = "task") -> "CancelToken":
+        child = CancelToken(timeout_seconds, parent=self, name=name)
+        if self._event.is_set():
+            child.cancel(self.reason)
+        return child
+
+
+_current = contextvars.ContextVar("cancel_token", default=None)
+
+
+def current_token() -> Optional[CancelToken]:
+    return _current.get()
+
+
+# Make `token` the one checked by code running in this context (and contexts copied from it)
+@contextmanager
+def cancel_scope(token: Optional[CancelToken]) -> Iterator[Optional[CancelToken]]:
+    reset = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(reset)
+
+
+def check_cancelled() -> None:
+    token = _current.get()
+    if token is not None:
+        token.check()
+
+
+# time.sleep for code running under a token: raises Cancelled as soon as the token is
+# cancelled or its deadline passes, instead of sleeping through it
+def cancellable_sleep(seconds: float) -> None:
+    token = _current.get()
+    if token is None:
+        time.sleep(seconds)
+        return
+    token.wait(seconds)
+    token.check()
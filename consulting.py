@@ -0,0 +1,233 @@
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional, Tuple
+from cancellation import CancelToken, Cancelled, cancel_scope
+from prompt_context import (CONTEXT_TOKEN_BUDGET, agent_goal, llm_summarizer, prepare_context, shared_prefix_templates,
+                            task_description)
+from scheduler import run_task_graph
+from result_cache import ResultCache, make_cache_key
+from routing import FAST_MODEL_NAME, ROUTING_FINAL, agent_routing, needs_synthesis, synthesize
+from streaming import describe_step
+from tracing import event, span, start_trace
+
+# crewAI and the Groq SDK take seconds to import; they are only loaded once a run starts
+if TYPE_CHECKING:
+    from groq import Groq
+    from groq_llm import GroqClientLLM
+
+# Maximum number of agent tasks running at the same time
+MAX_CONCURRENT_TASKS = 3
+
+# Wall-clock limits for one agent's task and for a whole run; agents still working when
+# their time is up are stopped and the run returns the outputs finished so far
+TASK_TIMEOUT_SECONDS = 240
+RUN_TIMEOUT_SECONDS = 600
+
+# LLM used by every agent (also part of the result cache key)
+MODEL_NAME = "groq/llama-3.1-70b-versatile"
+# Models a crew runs with when a fast model is available; results are only reused for the same pair
+CREW_MODELS = f"{MODEL_NAME}+{FAST_MODEL_NAME}"
+
+# Example agent data
+example_data = [
+    {
+        "name": "Tlaloc",
+        "backstory": "Tlaloc is a seasoned Digital Strategy Consultant with a passion for crafting innovative solutions for businesses of all sizes. With a background in marketing and technology, Tlaloc has helped numerous clients achieve their growth objectives through strategic digital initiatives.",
+        "role": "Digital Strategy Consultant",
+        "goal": "To craft an efficient digital strategy tailored for your business context, optimizing growth, customer engagement, and scaling opportunities based on the following context: {}.",
+        "task": "Design a tailored digital strategy for the provided business context, focusing on critical aspects such as online presence, scaling, and operational efficiency. Specific challenges provided by the client: {}.",
+        "output": """
+         1. Executive Summary
+         2. Business Context and Challenges
+         3. Key Initiatives
+         4. Actionable Steps
+         5. Budget Allocation
+         6. Expected Outcomes
+        """,
+        "routing": "tiered",
+    },
+    {
+        "name": "Arminius",
+        "backstory": "Arminius is a seasoned Data Scientist with a knack for uncovering actionable insights from complex datasets. With a background in machine learning and analytics, Arminius has helped businesses leverage their data to drive strategic decision-making and operational efficiency.",
+        "role": "Analytics & Automation Specialist",
+        "goal": "To integrate analytics and automation into the business model, ensuring data-driven decision-making and optimized customer engagement, focusing on the client's specific challenges: {}.",
+        "task": "Implement data-driven solutions for customer engagement and operational automation. Challenges and context provided by the client: {}.",
+        "output": """
+         1. Analytics Overview
+         2. Automation Recommendations
+         3. Key Metrics to Track
+         4. Integration Plan
+         5. Budget Overview
+         6. Expected Outcomes
+        """,
+        "routing": "tiered",
+    },
+    {
+        "name": "Thusnelda",
+        "backstory": "Thusnelda is a seasoned UX/UI Designer with a passion for creating intuitive and engaging user experiences. With a background in design and human-computer interaction, Thusnelda has helped businesses enhance their digital products and services through user-centric design principles.",
+        "role": "Marketing & Growth Specialist",
+        "goal": "To develop a high-impact digital marketing strategy to enhance growth, customer acquisition, and brand visibility, based on the business context provided: {}.",
+        "task": "Create a scalable digital marketing strategy with key focus areas such as SEO, social media engagement, and customer outreach. Client challenges and context: {}.",
+        "output": """
+         1. Marketing Strategy Overview
+         2. Focus on Growth Opportunities
+         3. Campaign Execution Plan
+         4. Budget and ROI Estimates
+         5. Key Growth Projections
+        """,
+        "routing": "tiered",
+    }
+]
+
+# Build the business context the agents receive from a Business/Challenges/Budget example
+def format_example(example: Dict[str, str]) -> str:
+    return f"Business: {example['Business']}\nChallenges: {example['Challenges']}\nBudget: {example['Budget']}"
+
+# Groq client and crewAI LLM for the given API key. The LLM sends its requests through the client,
+# which uses the process-wide rate-limited HTTP client; that also owns retries, so the SDK's own
+# retries are disabled. `base_url` points both at another OpenAI-compatible endpoint (e.g. the
+# benchmark stand-in).
+def create_clients(groq_api_key: str, model: str = MODEL_NAME,
+                   base_url: Optional[str] = None) -> Tuple["Groq", "GroqClientLLM"]:
+    from groq import Groq
+    from groq_llm import GroqClientLLM
+    from rate_limit import get_http_client
+
+    client = Groq(api_key=groq_api_key, base_url=base_url, http_client=get_http_client(), max_retries=0)
+    return client, GroqClientLLM(model=model, client=client)
+
+# Main function to run the consulting process
+def run_consulting_process(business_context: str, agent_data: List[Dict], client: "Groq", llm: "GroqClientLLM",
+                           max_concurrency: int = MAX_CONCURRENT_TASKS, cache: Optional[ResultCache] = None,
+                           use_cache: bool = True, context_token_budget: int = CONTEXT_TOKEN_BUDGET,
+                           tools: Optional[List[Any]] = None, fast_llm: Optional["GroqClientLLM"] = None,
+                           on_event: Optional[Callable[[str, str, str], None]] = None,
+                           cancel: Optional[CancelToken] = None, task_timeout: Optional[float] = TASK_TIMEOUT_SECONDS,
+                           run_timeout: Optional[float] = RUN_TIMEOUT_SECONDS,
+                           search: Optional[Callable[[str], str]] = None,
+                           search_cache: Optional[ResultCache] = None) -> List[Dict[str, str]]:
+    from crewai import Crew, Agent, Task
+
+    # Progress is reported as on_event(agent_name, event_type, text); events may come from worker threads
+    def emit(agent_name: str, kind: str, text: str = ""):
+        if on_event is not None:
+            on_event(agent_name, kind, text)
+
+    # Report an agent step to the UI and, for tool use, to the trace; stop the agent between
+    # steps once its task is cancelled or out of time
+    def on_step(agent_name: str, step, token: CancelToken):
+        tool = getattr(step, "tool", None)
+        if tool:
+            event(f"tool:{tool}", "tool", agent=agent_name, tool=tool)
+        emit(agent_name, "step", describe_step(step))
+        token.check()
+
+    # `cancel` (e.g. the UI's job) can stop the run early; the run's own deadline applies on top of it
+    run_token = cancel.child(run_timeout, name="run") if cancel is not None else CancelToken(run_timeout)
+    with start_trace("consulting_run", agents=len(agent_data), model=MODEL_NAME), cancel_scope(run_token):
+        # Serve repeated requests from the result cache before any LLM call
+        models = MODEL_NAME if fast_llm is None else CREW_MODELS
+        cache_key = make_cache_key(business_context, agent_data, models)
+        if cache is not None and use_cache:
+            with span("cache.lookup", "cache") as lookup:
+                cached = cache.get(cache_key)
+                lookup["attrs"]["hit"] = cached is not None
+            if cached is not None:
+                for result in cached:
+                    emit(result['name'], "finished", result['output'])
+                return cached
+
+        # All agents share one search tool; the searches every crew makes start in the background right away
+        if search is not None:
+            from search_cache import RunSearch, shared_search_tool, standard_queries
+
+            run_search = RunSearch(search, search_cache)
+            prefetched = standard_queries(business_context)
+            run_search.prefetch(prefetched)
+            tools = (tools or []) + [shared_search_tool(run_search, prefetched)]
+
+        # Bring the context under budget once; it is then sent a single time per agent, as a shared prefix
+        with span("context.prepare", "context"):
+            context = prepare_context(business_context, agent_data, budget=context_token_budget,
+                                      summarize=llm_summarizer(client))
+
+        # Each agent runs as its own single-task crew so independent agents can work in parallel;
+        # agents listing others in "depends_on" start once those outputs are available.
+        # With a fast model available, agents draft with it according to their "routing" (see routing.py).
+        # Agents that run out of time report "stopped", and agents whose work fails (e.g. retries exhausted)
+        # report "failed"; both raise Cancelled, which leaves them out of the results and lets the others finish.
+        stopped = set()
+        failed = {}
+
+        def run_task(data: Dict, upstream: Dict[str, str]) -> str:
+            token = run_token.child(task_timeout, name=f"task of {data['name']}")
+            with cancel_scope(token):
+                return run_agent(data, upstream, token)
+
+        def run_agent(data: Dict, upstream: Dict[str, str], token: CancelToken) -> str:
+            token.check()
+            emit(data['name'], "started")
+            routing = agent_routing(data) if fast_llm is not None else ROUTING_FINAL
+            agent = Agent(
+                role=data['role'],
+                goal=agent_goal(data),
+                backstory=data['backstory'],
+                llm=llm if routing == ROUTING_FINAL else fast_llm,
+                function_calling_llm=fast_llm or llm,
+                tools=tools or [],
+                verbose=False,
+                step_callback=lambda step: on_step(data['name'], step, token),
+                **shared_prefix_templates(context),
+                # allow_delegation=True,
+                # max_iter=4
+            )
+            description = task_description(data)
+            if upstream:
+                description += "\n\nWork from your colleagues to build upon:\n" + "\n\n".join(
+                    f"{name}:\n{output}" for name, output in upstream.items())
+            task = Task(
+                description=description,
+                expected_output=data['output'],
+                agent=agent,
+            )
+            crew = Crew(agents=[agent], tasks=[task])
+            try:
+                with span(f"agent:{data['name']}", "agent", agent=data['name'], role=data['role'],
+                          routing=routing) as record:
+                    output = crew.kickoff().raw
+                    token.check()
+                    if routing != ROUTING_FINAL and needs_synthesis(data, output):
+                        record["attrs"]["synthesized"] = True
+                        emit(data['name'], "step", "Writing the final report sections...")
+                        output = synthesize(client, MODEL_NAME, data, context, output)
+            except Exception as e:
+                # Cancellation surfaces from inside crewAI or the LLM client wrapped in their own errors
+                reason = token.stop_reason
+                if reason is not None:
+                    stopped.add(data['name'])
+                    emit(data['name'], "stopped", reason)
+                    raise Cancelled(reason) from e
+                failed[data['name']] = e
+                emit(data['name'], "failed", str(e))
+                raise Cancelled(f"{data['name']} failed: {e}") from e
+            run_token.check()  # the run may already have returned without this agent
+            emit(data['name'], "finished", output)
+            return output
+
+        try:
+            outputs = run_task_graph(agent_data, run_task, max_concurrency=max_concurrency, cancel=run_token)
+        finally:
+            # Agents still running after the run returns (early, or with an error) stop at their next check
+            run_token.cancel("The run has ended.")
+        results = [{"name": data['name'], "role": data['role'], "output": outputs[data['name']]}
+                   for data in agent_data if data['name'] in outputs]
+        if failed and not results:
+            raise next(iter(failed.values()))  # nothing to show; report the run as failed
+        if len(results) < len(agent_data):
+            for data in agent_data:
+                if data['name'] in outputs or data['name'] in stopped or data['name'] in failed:
+                    continue
+                unfinished = [dep for dep in data.get('depends_on', []) if dep not in outputs]
+                emit(data['name'], "stopped", f"Skipped because {', '.join(unfinished)} did not finish." if unfinished
+                     else "Not finished before the run was stopped.")
+        elif cache is not None:
+            cache.set(cache_key, results)
+        return results
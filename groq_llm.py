@@ -0,0 +1,47 @@
+from typing import Any, Dict, List, Optional, Union
+
+from crewai import LLM
+
+from cancellation import Cancelled
+from routing import provider_model
+
+# Groq accepts at most this many stop sequences per request
+MAX_STOP_SEQUENCES = 4
+
+
+# crewAI LLM that sends every completion through our Groq client, and with it through the
+# shared rate-limited HTTP client (limits, backoff, tracing, cancellation). A plain crewAI
+# LLM - or a LangChain model, which crewAI converts into one - calls litellm with its own
+# HTTP stack, dropping the API key, base URL and HTTP client of the model it was given.
+class GroqClientLLM(LLM):
+    def __init__(self, model: str, client: Any, **kwargs):
+        super().__init__(model=model, api_key=client.api_key, base_url=str(client.base_url), **kwargs)
+        self.client = client
+
+    def call(self, messages: Union[str, List[Dict[str, str]]], callbacks: Optional[List[Any]] = None,
+             *args, **kwargs) -> str:
+        if isinstance(messages, str):
+            messages = [{"role": "user", "content": messages}]
+        params = {
+            "model": provider_model(self.model),
+            "messages": messages,
+            "temperature": self.temperature,
+            "top_p": self.top_p,
+            "max_tokens": self.max_tokens or self.max_completion_tokens,
+            "stop": list(self.stop)[:MAX_STOP_SEQUENCES] if self.stop else None,
+            "seed": self.seed,
+            "timeout": self.timeout,
+        }
+        try:
+            response = self.client.chat.completions.create(**{k: v for k, v in params.items() if v is not None})
+        except Exception as e:
+            # The SDK wraps errors raised in the transport; a stopped run should surface as such
+            if isinstance(e.__cause__, Cancelled):
+                raise e.__cause__ from None
+            raise
+        return response.choices[0].message.content
+
+    # crewAI's function-calling path goes straight to litellm (via instructor); without it,
+    # tool arguments and structured outputs are parsed from a regular `call`
+    def supports_function_calling(self) -> bool:
+        return False
@@ -0,0 +1,134 @@
+from concurrent.futures import ThreadPoolExecutor
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+from cancellation import CancelToken
+from streaming import RunEvents
+
+DEFAULT_MAX_WORKERS = 4
+# Finished jobs are kept this long so a refreshed page can still reattach to them
+DEFAULT_RESULT_TTL_SECONDS = 60 * 60
+# Unfinished jobs whose page has not checked in for this long are cancelled (the user left or closed the tab)
+DEFAULT_ABANDON_AFTER_SECONDS = 30
+WATCHDOG_INTERVAL_SECONDS = 5
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+# A single crew run tracked by the job manager
+class Job:
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+        self.events = RunEvents()
+        # All events seen so far, so a new page (or rerun) can rebuild the live view
+        self.history = []
+        self.cancel_token = CancelToken(name="job")
+        self.last_seen = time.time()
+        self._lock = threading.Lock()
+
+    # Called by the page following this job; jobs nobody follows any more get cancelled
+    def touch(self) -> None:
+        self.last_seen = time.time()
+
+    def cancel(self, reason: str = "Stopped by the user.") -> None:
+        self.cancel_token.cancel(reason)
+
+    def emit(self, agent: str, kind: str, text: str = "") -> None:
+        self.events.emit(agent, kind, text)
+
+    # Events accumulated since the job started, collected from the worker's queue
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            self.history.extend(self.events.drain())
+            return list(self.history)
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (DONE, FAILED)
+
+
+# Bounded worker pool executing crew runs independently of the Streamlit script thread
+class JobManager:
+    def __init__(self, max_workers: int = DEFAULT_MAX_WORKERS, result_ttl_seconds: float = DEFAULT_RESULT_TTL_SECONDS,
+                 abandon_after_seconds: float = DEFAULT_ABANDON_AFTER_SECONDS):
+        self.result_ttl_seconds = result_ttl_seconds
+        self.abandon_after_seconds = abandon_after_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="crew-job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        threading.Thread(target=self._watch, name="crew-job-watchdog", daemon=True).start()
+
+    # Queue `fn(*args, on_event=job.emit, cancel=job.cancel_token, **kwargs)` and return the new job's ID
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> str:
+        job = Job(uuid.uuid4().hex)
+        with self._lock:
+            self._purge()
+            self._jobs[job.id] = job
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job.id
+
+    def _run(self, job: Job, fn: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> None:
+        # Abandoned while still queued: don't start at all
+        reason = job.cancel_token.stop_reason
+        if reason is not None:
+            job.error = reason
+            job.status = FAILED
+            job.finished_at = time.time()
+            return
+        job.status = RUNNING
+        try:
+            job.result = fn(*args, on_event=job.emit, cancel=job.cancel_token, **kwargs)
+            job.status = DONE
+        except Exception as e:
+            job.error = str(e)
+            job.status = FAILED
+        finally:
+            job.finished_at = time.time()
+
+    def get(self, job_id: Optional[str]) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def get_all(self) -> List[Job]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return counts
+
+    # Forget finished jobs nobody reattached to in time
+    def _purge(self) -> None:
+        cutoff = time.time() - self.result_ttl_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items()
+                       if job.finished and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    # Cancel unfinished jobs whose page stopped checking in
+    def _watch(self) -> None:
+        while not self._closed.wait(WATCHDOG_INTERVAL_SECONDS):
+            cutoff = time.time() - self.abandon_after_seconds
+            with self._lock:
+                abandoned = [job for job in self._jobs.values() if not job.finished and job.last_seen < cutoff]
+            for job in abandoned:
+                job.cancel("Nobody was waiting for the results any more.")
+
+    def shutdown(self) -> None:
+        self._closed.set()
+        for job in self.get_all():
+            job.cancel("The server is shutting down.")
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,196 @@
+from collections import deque
+from contextlib import contextmanager
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from tracing import percentile, span
+
+# Agent memory for memory-enabled crews: one SQLite file with full-text search, namespaced per
+# session, capped in size and age so lookups stay fast however long the app runs
+MEMORY_DB_PATH = os.path.join("db", "agent_memory.sqlite3")
+MAX_ITEMS_PER_NAMESPACE = 200
+MAX_AGE_SECONDS = 7 * 24 * 60 * 60
+# Compact after this many writes (to any namespace), and VACUUM after this many compactions
+COMPACT_EVERY = 50
+VACUUM_EVERY = 20
+LATENCY_WINDOW = 1000
+
+
+# FTS5 query matching any word of free text (quoted, so user text can't inject query syntax)
+def fts_query(text: str) -> str:
+    words = re.findall(r"\w+", text.lower())[:32]
+    return " OR ".join(f'"{word}"' for word in words)
+
+
+class MemoryStore:
+    def __init__(self, path: str = MEMORY_DB_PATH, max_items: int = MAX_ITEMS_PER_NAMESPACE,
+                 max_age_seconds: float = MAX_AGE_SECONDS):
+        self.path = path
+        self.max_items = max_items
+        self.max_age_seconds = max_age_seconds
+        self._writes = 0
+        self._compactions = 0
+        self._search_ms = deque(maxlen=LATENCY_WINDOW)
+        self._lock = threading.Lock()
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS memories ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " namespace TEXT NOT NULL,"
+                " value TEXT NOT NULL,"
+                " metadata TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_namespace ON memories (namespace, created_at)")
+            conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(value, content='memories', content_rowid='id')")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS memories_ai AFTER INSERT ON memories BEGIN"
+                         " INSERT INTO memories_fts (rowid, value) VALUES (new.id, new.value); END")
+            conn.execute("CREATE TRIGGER IF NOT EXISTS memories_ad AFTER DELETE ON memories BEGIN"
+                         " INSERT INTO memories_fts (memories_fts, rowid, value) VALUES ('delete', old.id, old.value); END")
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def save(self, namespace: str, value: str, metadata: Optional[Dict[str, Any]] = None) -> None:
+        with self._connect() as conn:
+            conn.execute("INSERT INTO memories (namespace, value, metadata, created_at) VALUES (?, ?, ?, ?)",
+                         (namespace, value, json.dumps(metadata or {}, default=str), time.time()))
+        # Counted across namespaces: each browser session is its own namespace and rarely writes much
+        with self._lock:
+            self._writes += 1
+            due = self._writes % COMPACT_EVERY == 0
+        if due:
+            self.compact()
+
+    # Best full-text matches within the namespace, newest first among equal ranks
+    def search(self, namespace: str, query: str, limit: int = 3) -> List[Dict[str, Any]]:
+        match = fts_query(query)
+        if not match:
+            return []
+        started = time.perf_counter()
+        with span("memory.search", "memory", namespace=namespace), self._connect() as conn:
+            rows = conn.execute(
+                "SELECT m.value, m.metadata, bm25(memories_fts) AS rank FROM memories_fts"
+                " JOIN memories m ON m.id = memories_fts.rowid"
+                " WHERE memories_fts MATCH ? AND m.namespace = ? AND m.created_at >= ?"
+                " ORDER BY rank, m.created_at DESC LIMIT ?",
+                (match, namespace, time.time() - self.max_age_seconds, limit),
+            ).fetchall()
+        with self._lock:
+            self._search_ms.append((time.perf_counter() - started) * 1000)
+        return [{"context": value, "memory": value, "metadata": json.loads(metadata), "score": -rank}
+                for value, metadata, rank in rows]
+
+    # Drop expired entries and everything beyond the per-namespace cap; VACUUM now and then
+    def compact(self, namespace: Optional[str] = None) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM memories WHERE created_at < ?", (time.time() - self.max_age_seconds,))
+            if namespace:
+                conn.execute("DELETE FROM memories WHERE id IN (SELECT id FROM memories WHERE namespace = ?"
+                             " ORDER BY created_at DESC LIMIT -1 OFFSET ?)", (namespace, self.max_items))
+            else:
+                conn.execute("DELETE FROM memories WHERE id IN (SELECT id FROM (SELECT id, ROW_NUMBER() OVER"
+                             " (PARTITION BY namespace ORDER BY created_at DESC) AS position FROM memories)"
+                             " WHERE position > ?)", (self.max_items,))
+        with self._lock:
+            self._compactions += 1
+            vacuum = self._compactions % VACUUM_EVERY == 0
+        if vacuum:
+            self.vacuum()
+
+    def vacuum(self) -> None:
+        conn = sqlite3.connect(self.path, timeout=30)
+        try:
+            conn.execute("INSERT INTO memories_fts (memories_fts) VALUES ('optimize')")
+            conn.commit()
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+
+    def reset(self, namespace: str) -> None:
+        with self._connect() as conn:
+            conn.execute("DELETE FROM memories WHERE namespace = ?", (namespace,))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._connect() as conn:
+            items, namespaces = conn.execute("SELECT COUNT(*), COUNT(DISTINCT namespace) FROM memories").fetchone()
+        with self._lock:
+            latencies = list(self._search_ms)
+        return {"items": items, "namespaces": namespaces,
+                "bytes": os.path.getsize(self.path) if os.path.exists(self.path) else 0,
+                "search_ms": {"p50": round(percentile(latencies, 50), 3), "p95": round(percentile(latencies, 95), 3)}}
+
+
+# crewAI storage interface used by short-term and entity memory
+class NamespacedRAGStorage:
+    def __init__(self, store: MemoryStore, namespace: str):
+        self.store = store
+        self.namespace = namespace
+
+    def save(self, value: Any, metadata: Optional[Dict[str, Any]] = None, *args, **kwargs) -> None:
+        self.store.save(self.namespace, str(value), metadata)
+
+    def search(self, query: str, limit: int = 3, filter: Optional[dict] = None,
+               score_threshold: float = 0.0, *args, **kwargs) -> List[Dict[str, Any]]:
+        return self.store.search(self.namespace, query, limit)
+
+    def reset(self) -> None:
+        self.store.reset(self.namespace)
+
+
+# crewAI storage interface used by long-term memory (task evaluations)
+class NamespacedLongTermStorage:
+    def __init__(self, store: MemoryStore, namespace: str):
+        self.store = store
+        self.namespace = namespace
+
+    def save(self, task_description: str, metadata: Dict[str, Any], datetime: str, score: float) -> None:
+        self.store.save(self.namespace, task_description, {**metadata, "datetime": datetime, "score": score})
+
+    def load(self, task_description: str, latest_n: int) -> Optional[List[Dict[str, Any]]]:
+        rows = self.store.search(self.namespace, task_description, latest_n)
+        if not rows:
+            return None
+        return [{"metadata": row["metadata"], "datetime": row["metadata"].get("datetime"),
+                 "score": row["metadata"].get("score")} for row in rows]
+
+    def reset(self) -> None:
+        self.store.reset(self.namespace)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_memory_store() -> MemoryStore:
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = MemoryStore()
+        return _store
+
+
+# Crew keyword arguments enabling memory backed by the bounded store, isolated per session
+def crew_memory(session_id: str) -> Dict[str, Any]:
+    from crewai.memory import EntityMemory, LongTermMemory, ShortTermMemory
+
+    store = get_memory_store()
+    return {
+        "memory": True,
+        "short_term_memory": ShortTermMemory(storage=NamespacedRAGStorage(store, f"{session_id}:short_term")),
+        "entity_memory": EntityMemory(storage=NamespacedRAGStorage(store, f"{session_id}:entities")),
+        "long_term_memory": LongTermMemory(storage=NamespacedLongTermStorage(store, f"{session_id}:long_term")),
+    }
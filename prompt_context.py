@@ -0,0 +1,94 @@
+import re
+from typing import Callable, Dict, List, Optional
+
+# Upper bound for the business context injected into the crew, in (estimated) tokens
+CONTEXT_TOKEN_BUDGET = 1500
+# Upper bound for everything one agent is prompted with: role, goal, backstory, task and expected output
+PROMPT_TOKEN_BUDGET = 3000
+# The context keeps at least this many tokens, however long the agent templates are
+MIN_CONTEXT_TOKENS = 200
+
+# Model used to shorten oversized contexts; a small one keeps this step cheap
+SUMMARY_MODEL = "llama-3.1-8b-instant"
+
+# Stands in for the context inside the agent templates; the context itself is sent once, as a prefix
+CONTEXT_REFERENCE = "the client context given at the start of this prompt"
+CONTEXT_PREFIX = "Client context:\n{}\n\n"
+
+TRUNCATION_MARKER = " [...]"
+
+
+# Cheap token estimate (~4 characters per token for English text, never fewer than the word count)
+def count_tokens(text: str) -> int:
+    return max(len(text) // 4, len(text.split()))
+
+
+# Shorten to at most `budget` tokens, cutting at a sentence boundary when one is close enough
+def truncate_to_budget(text: str, budget: int) -> str:
+    if count_tokens(text) <= budget:
+        return text
+    cut = text[:max(0, budget - count_tokens(TRUNCATION_MARKER)) * 4]
+    boundary = max(cut.rfind(". "), cut.rfind("\n"))
+    if boundary > len(cut) // 2:
+        cut = cut[:boundary + 1]
+    return cut.rstrip() + TRUNCATION_MARKER
+
+
+# Summarizer backed by the Groq client; returns None when the call fails so we can fall back to truncation
+def llm_summarizer(client, model: str = SUMMARY_MODEL) -> Callable[[str, int], Optional[str]]:
+    def summarize(text: str, budget: int) -> Optional[str]:
+        try:
+            response = client.chat.completions.create(
+                model=model,
+                messages=[
+                    {"role": "system", "content": "Summarize the client's business description for a team of consultants. "
+                                                  "Keep every fact, number, budget and challenge; drop repetition and filler."},
+                    {"role": "user", "content": text},
+                ],
+                max_tokens=budget,
+            )
+            return response.choices[0].message.content
+        except Exception:
+            return None
+    return summarize
+
+
+# Token budget left for the context after the largest agent template
+def context_budget(agent_data: List[Dict], budget: int = CONTEXT_TOKEN_BUDGET,
+                   prompt_budget: int = PROMPT_TOKEN_BUDGET) -> int:
+    overhead = max((count_tokens(" ".join(str(data.get(field, "")) for field in ("role", "goal", "backstory", "task", "output")))
+                    for data in agent_data), default=0)
+    return max(MIN_CONTEXT_TOKENS, min(budget, prompt_budget - overhead - count_tokens(CONTEXT_PREFIX)))
+
+
+# Normalize the context and bring it under budget before the crew starts
+def prepare_context(business_context: str, agent_data: List[Dict], budget: int = CONTEXT_TOKEN_BUDGET,
+                    summarize: Optional[Callable[[str, int], Optional[str]]] = None) -> str:
+    context = re.sub(r"[ \t]+", " ", business_context).strip()
+    context = re.sub(r"\n{3,}", "\n\n", context)
+    limit = context_budget(agent_data, budget)
+    if count_tokens(context) <= limit:
+        return context
+    if summarize is not None and limit > 0:
+        summary = summarize(context, limit)
+        if summary:
+            context = summary.strip()
+    return truncate_to_budget(context, limit)
+
+
+# Goal for an agent template, pointing at the shared context instead of repeating it
+def agent_goal(data: Dict) -> str:
+    return data['goal'].format(CONTEXT_REFERENCE)
+
+
+# Task description pointing at the shared context
+def task_description(data: Dict) -> str:
+    return data['task'].format(CONTEXT_REFERENCE)
+
+
+# crewAI agent templates placing the context first in every agent's prompt, ahead of its role,
+# backstory and goal, so all agents of a run send the same leading text (and providers that
+# cache prompt prefixes can reuse it)
+def shared_prefix_templates(context: str) -> Dict[str, str]:
+    return {"system_template": CONTEXT_PREFIX.format(context) + "{{ .System }}",
+            "prompt_template": "{{ .Prompt }}", "response_template": "{{ .Response }}"}
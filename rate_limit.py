@@ -0,0 +1,229 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+from typing import Optional
+
+import httpx
+
+from cancellation import cancellable_sleep, check_cancelled, current_token
+from tracing import span
+
+# Provider limits shared by every LLM call in this process (override via environment)
+REQUESTS_PER_MINUTE = float(os.environ.get("GROQ_REQUESTS_PER_MINUTE", 30))
+TOKENS_PER_MINUTE = float(os.environ.get("GROQ_TOKENS_PER_MINUTE", 6000))
+
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+# Completion tokens assumed for requests that do not set max_tokens
+DEFAULT_COMPLETION_TOKENS = 1024
+MAX_CONNECTIONS = 20
+
+
+# Classic token bucket refilled continuously at `rate_per_minute`
+class TokenBucket:
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity if capacity is not None else rate_per_minute
+        self.tokens = self.capacity
+        self.updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    # Block until `amount` tokens are available and take them; returns the time waited.
+    # Raises Cancelled, without taking any tokens, if the current run stops while waiting.
+    def acquire(self, amount: float = 1.0) -> float:
+        amount = min(amount, self.capacity)  # a single oversized request must still get through
+        started = time.monotonic()
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.rate)
+                self.updated_at = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return now - started
+                delay = (amount - self.tokens) / self.rate
+            cancellable_sleep(delay)
+
+    # Empty the bucket when the provider tells us we are over the limit anyway
+    def drain(self) -> None:
+        with self._lock:
+            self.tokens = 0.0
+            self.updated_at = time.monotonic()
+
+
+# Requests-per-minute and tokens-per-minute limits applied together
+class RateLimiter:
+    def __init__(self, requests_per_minute: float = REQUESTS_PER_MINUTE, tokens_per_minute: float = TOKENS_PER_MINUTE):
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+    def acquire(self, tokens: float) -> float:
+        return self.requests.acquire(1) + self.tokens.acquire(tokens)
+
+    # Swap in new limits, e.g. for benchmarks against a local stand-in
+    def configure(self, requests_per_minute: float, tokens_per_minute: float) -> None:
+        self.requests = TokenBucket(requests_per_minute)
+        self.tokens = TokenBucket(tokens_per_minute)
+
+
+# Rough prompt + completion token estimate for an OpenAI-style chat request body
+def estimate_request_tokens(body: bytes) -> int:
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        return len(body) // 4
+    prompt_chars = sum(len(str(message.get("content", ""))) for message in payload.get("messages", []))
+    return prompt_chars // 4 + int(payload.get("max_tokens") or DEFAULT_COMPLETION_TOKENS)
+
+
+# Model named in an OpenAI-style request body, so traces can split calls by model tier
+def request_model(body: bytes) -> Optional[str]:
+    try:
+        return json.loads(body or b"{}").get("model")
+    except (ValueError, AttributeError):
+        return None
+
+
+# Seconds in a header duration ("7", "1.5s", "2m3.5s", "250ms"), or None if it isn't one
+def parse_duration(value: Optional[str]) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    parts = re.findall(r"([\d.]+)(ms|h|m|s)", value)
+    if not parts:
+        return None
+    units = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(number) * units[unit] for number, unit in parts)
+
+
+# Seconds to wait before retrying, from Retry-After only. The x-ratelimit-reset-* headers are sent
+# on every response and give the time until a whole quota window resets (often minutes), not
+# the time until the next request is allowed.
+def retry_after_seconds(response: httpx.Response) -> Optional[float]:
+    return parse_duration(response.headers.get("retry-after"))
+
+
+# On a 429, empty the bucket(s) the provider reports as exhausted (the request bucket if it doesn't say)
+def drain_exhausted(limiter: "RateLimiter", response: httpx.Response) -> None:
+    requests_left = response.headers.get("x-ratelimit-remaining-requests")
+    tokens_left = response.headers.get("x-ratelimit-remaining-tokens")
+    if tokens_left == "0":
+        limiter.tokens.drain()
+    if requests_left == "0" or tokens_left != "0":
+        limiter.requests.drain()
+
+
+# Copy the provider-reported token usage of a (non-streaming) chat response into span attributes
+def record_usage(request: httpx.Request, response: httpx.Response, attrs: dict) -> None:
+    if response.status_code != 200 or b'"stream":true' in request.content.replace(b" ", b""):
+        return
+    try:
+        usage = json.loads(response.read()).get("usage") or {}
+    except ValueError:
+        return
+    for key in ("prompt_tokens", "completion_tokens", "total_tokens"):
+        if key in usage:
+            attrs[key] = usage[key]
+
+
+# Full-jitter exponential backoff, never shorter than what the provider asked for
+def backoff_delay(attempt: int, retry_after: Optional[float] = None) -> float:
+    delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+# Shorten the request's timeouts to the time left before the current run's or task's deadline
+def limit_timeout(request: httpx.Request) -> None:
+    token = current_token()
+    remaining = token.remaining() if token is not None else None
+    if remaining is None:
+        return
+    remaining = max(remaining, 0.001)
+    timeout = dict(request.extensions.get("timeout", {}))
+    for key in ("connect", "read", "write", "pool"):
+        timeout[key] = remaining if timeout.get(key) is None else min(timeout[key], remaining)
+    request.extensions["timeout"] = timeout
+
+
+# httpx transport that waits for the shared limiter before every request and
+# retries rate-limited or failed requests with backoff
+class RateLimitedTransport(httpx.BaseTransport):
+    def __init__(self, limiter: RateLimiter, max_retries: int = MAX_RETRIES):
+        self.limiter = limiter
+        self.max_retries = max_retries
+        self._transport = httpx.HTTPTransport(limits=httpx.Limits(max_connections=MAX_CONNECTIONS))
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        request.read()
+        tokens = estimate_request_tokens(request.content)
+        with span("llm.request", "llm", url=request.url.path, model=request_model(request.content),
+                  estimated_tokens=tokens) as record:
+            response = self._send_with_retries(request, tokens, record["attrs"])
+            record["attrs"]["status_code"] = response.status_code
+            record_usage(request, response, record["attrs"])
+            return response
+
+    def _send_with_retries(self, request: httpx.Request, tokens: int, attrs: dict) -> httpx.Response:
+        attempt = 0
+        attrs["rate_limit_wait_ms"] = 0.0
+        while True:
+            attrs["attempts"] = attempt + 1
+            attrs["rate_limit_wait_ms"] += round(self.limiter.acquire(tokens) * 1000, 3)
+            # Cancelled or timed-out runs stop before the next request, and no request outlives the deadline
+            check_cancelled()
+            limit_timeout(request)
+            try:
+                response = self._transport.handle_request(request)
+            except httpx.TransportError:
+                check_cancelled()  # a request cut short by the deadline is not retried
+                if attempt >= self.max_retries:
+                    raise
+                cancellable_sleep(backoff_delay(attempt))
+                attempt += 1
+                continue
+            if response.status_code not in RETRY_STATUS_CODES or attempt >= self.max_retries:
+                return response
+            if response.status_code == 429:
+                drain_exhausted(self.limiter, response)
+            delay = backoff_delay(attempt, retry_after_seconds(response))
+            response.close()
+            cancellable_sleep(delay)
+            attempt += 1
+
+    def close(self) -> None:
+        self._transport.close()
+
+
+_limiter = None
+_http_client = None
+_lock = threading.Lock()
+
+
+# Process-wide limiter shared by every client
+def get_rate_limiter() -> RateLimiter:
+    global _limiter
+    with _lock:
+        if _limiter is None:
+            _limiter = RateLimiter()
+        return _limiter
+
+
+# Process-wide pooled HTTP client; httpx clients are thread-safe and reuse keep-alive connections
+def get_http_client() -> httpx.Client:
+    global _http_client
+    limiter = get_rate_limiter()
+    with _lock:
+        if _http_client is None:
+            _http_client = httpx.Client(transport=RateLimitedTransport(limiter), timeout=httpx.Timeout(120.0))
+        return _http_client
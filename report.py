@@ -0,0 +1,94 @@
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+import threading
+from typing import Dict, List
+
+from fpdf import FPDF, HTMLMixin
+import markdown2
+
+REPORT_FILE_NAME = "effiweb.solutions_free_consulting_report.pdf"
+MISSING_SECTION_HTML = "<p><i>This agent did not finish in time, so its section is missing.</i></p>"
+
+
+# PDF report with header, footer, and professional formatting
+class PDF(FPDF, HTMLMixin):
+    def header(self):
+        self.set_font("Arial", 'B', 14)
+        self.cell(0, 10, "effiweb Solutions Consulting Report", 0, 1, 'C', link="https://effiweb.solutions")
+        self.ln(5)
+
+    def footer(self):
+        self.set_y(-15)
+        self.set_font("Arial", 'I', 8)
+        self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
+
+
+# The built-in PDF fonts only cover Latin-1
+def _latin1(text: str) -> str:
+    return text.encode("latin-1", "replace").decode("latin-1")
+
+
+# Convert Markdown to HTML
+def markdown_to_html(markdown_content: str) -> str:
+    return markdown2.markdown(_latin1(markdown_content))
+
+
+def add_multiline_text(pdf: FPDF, title: str, html_content: str):
+    pdf.set_font("Arial", 'B', 12)
+    pdf.cell(0, 10, _latin1(title), 0, 1, 'L')
+    pdf.ln(5)
+    if html_content:
+        pdf.write_html(html_content)
+
+
+# Builds the report section by section on a background thread while agents are still working.
+# Sections are written in agent order; ones that finish early wait until their predecessors are in.
+class ReportBuilder:
+    def __init__(self, agent_data: List[Dict]):
+        self.order = [data['name'] for data in agent_data]
+        self.roles = {data['name']: data['role'] for data in agent_data}
+        self.pdf = PDF()
+        self.pdf.add_page()
+        self._rendered = {}
+        self._next = 0
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report")
+
+    # Queue an agent's finished output for rendering; returns immediately
+    def add_section(self, agent_name: str, output: str) -> None:
+        if agent_name not in self.roles:
+            return
+        try:
+            self._executor.submit(self._render, agent_name, output)
+        except RuntimeError:
+            pass  # arrived after the report was built (an agent finishing past the run's deadline)
+
+    def _render(self, agent_name: str, output: str) -> None:
+        html_content = markdown_to_html(output)
+        with self._lock:
+            self._rendered[agent_name] = html_content
+            while self._next < len(self.order) and self.order[self._next] in self._rendered:
+                name = self.order[self._next]
+                add_multiline_text(self.pdf, f"Agent {self._next + 1} - {self.roles[name]}", "")
+                add_multiline_text(self.pdf, "Proposed Solution", self._rendered.pop(name))
+                self._next += 1
+
+    # Wait for pending sections and return the finished PDF as an in-memory file. Agents without
+    # output (stopped or out of time) get a short note, so the sections after them still appear.
+    def build(self) -> BytesIO:
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for index in range(self._next, len(self.order)):
+                name = self.order[index]
+                add_multiline_text(self.pdf, f"Agent {index + 1} - {self.roles[name]}", "")
+                add_multiline_text(self.pdf, "Proposed Solution", self._rendered.pop(name, MISSING_SECTION_HTML))
+            self._next = len(self.order)
+            return BytesIO(bytes(self.pdf.output()))
+
+
+# Render a complete report from finished results in one go
+def build_report(agent_data: List[Dict], outputs: Dict[str, str]) -> BytesIO:
+    builder = ReportBuilder(agent_data)
+    for name, output in outputs.items():
+        builder.add_section(name, output)
+    return builder.build()
@@ -0,0 +1,66 @@
+import re
+from typing import Dict, List
+
+# Small, fast model for intermediate reasoning, delegation and tool use
+FAST_MODEL_NAME = "groq/llama-3.1-8b-instant"
+
+# Per-agent "routing" values in the agent specs:
+#   "tiered" - the fast model does the work, the large model always writes the final sections from its draft
+#   "fast"   - the fast model does everything; escalates to the large model if sections are missing
+#   "final"  - the large model does everything
+ROUTING_TIERED = "tiered"
+ROUTING_FAST = "fast"
+ROUTING_FINAL = "final"
+ROUTING_CHOICES = (ROUTING_TIERED, ROUTING_FAST, ROUTING_FINAL)
+DEFAULT_ROUTING = ROUTING_TIERED
+
+SYNTHESIS_MAX_TOKENS = 2048
+
+
+# Model name as the Groq API expects it (LangChain/LiteLLM-style names carry a "groq/" prefix)
+def provider_model(model: str) -> str:
+    return model.split("/", 1)[1] if model.startswith("groq/") else model
+
+
+# Section titles from an agent's numbered expected output ("1. Executive Summary" -> "Executive Summary")
+def expected_sections(expected_output: str) -> List[str]:
+    return [title.strip() for title in re.findall(r"^\s*\d+\.\s+(.+)$", expected_output, re.MULTILINE)]
+
+
+def missing_sections(output: str, expected_output: str) -> List[str]:
+    text = output.casefold()
+    return [title for title in expected_sections(expected_output) if title.casefold() not in text]
+
+
+def agent_routing(data: Dict) -> str:
+    routing = data.get('routing', DEFAULT_ROUTING)
+    if routing not in ROUTING_CHOICES:
+        raise ValueError(f"Unknown routing '{routing}' for agent '{data['name']}'.")
+    return routing
+
+
+# Whether the draft needs a pass through the large model
+def needs_synthesis(data: Dict, draft: str) -> bool:
+    routing = agent_routing(data)
+    if routing == ROUTING_TIERED:
+        return True
+    if routing == ROUTING_FAST and data.get('escalate', True):
+        return bool(missing_sections(draft, data['output']))
+    return False
+
+
+# One direct call to the large model turning the agent's draft into the final deliverable
+def synthesize(client, model: str, data: Dict, context: str, draft: str) -> str:
+    sections = "\n".join(f"{i}. {title}" for i, title in enumerate(expected_sections(data['output']), 1))
+    instructions = f"You are a {data['role']}. Turn your working notes into the final client deliverable in Markdown"
+    instructions += f", using exactly these sections:\n{sections}" if sections else "."
+    response = client.chat.completions.create(
+        model=provider_model(model),
+        messages=[
+            # Context first, as in the agents' prompts, so the request shares their prefix
+            {"role": "system", "content": f"Client context:\n{context}\n\n{instructions}"},
+            {"role": "user", "content": f"Working notes:\n{draft}"},
+        ],
+        max_tokens=SYNTHESIS_MAX_TOKENS,
+    )
+    return response.choices[0].message.content
@@ -0,0 +1,135 @@
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import contextvars
+import csv
+from typing import Any, Callable, Dict, List, Optional
+
+from cancellation import CancelToken, Cancelled
+
+# Default number of agent tasks allowed to talk to the LLM at the same time
+DEFAULT_MAX_CONCURRENCY = 3
+# How often a run waiting on its tasks checks whether it was cancelled
+CANCEL_POLL_SECONDS = 0.1
+
+# Generic templates for crews loaded from examples.csv (only roles are given there)
+CSV_GOAL_TEMPLATE = "To contribute your expertise as {role} to the use case '{use_case}', based on the following context: {{}}."
+CSV_TASK_TEMPLATE = "Analyse the provided context from the perspective of a {role} working on '{use_case}' and deliver concrete recommendations. Context provided by the client: {{}}."
+CSV_BACKSTORY_TEMPLATE = "You are an experienced {role} who has worked on many {use_case} projects."
+CSV_OUTPUT_TEMPLATE = """
+         1. Summary
+         2. Key Findings
+         3. Recommendations
+         4. Next Steps
+        """
+
+
+# Agent specs for one examples.csv row (use case plus 2-10 agent roles)
+def crew_spec_from_row(row: Dict[str, str]) -> List[Dict]:
+    use_case = row["Use Case"]
+    number_of_agents = int(row["Number of Agents"])
+    specs = []
+    for i in range(1, number_of_agents + 1):
+        role = (row.get(f"Agent {i} Role") or "").strip()
+        if not role:
+            continue
+        specs.append({
+            "name": role,
+            "role": role,
+            "goal": CSV_GOAL_TEMPLATE.format(role=role, use_case=use_case),
+            "task": CSV_TASK_TEMPLATE.format(role=role, use_case=use_case),
+            "backstory": CSV_BACKSTORY_TEMPLATE.format(role=role, use_case=use_case),
+            "output": CSV_OUTPUT_TEMPLATE,
+        })
+    return specs
+
+
+# Load the 2-10 agent crews from examples.csv as agent specs keyed by use case
+def load_crew_specs(path: str = "examples.csv") -> Dict[str, List[Dict]]:
+    with open(path, newline="", encoding="utf-8") as f:
+        return {row["Use Case"]: crew_spec_from_row(row) for row in csv.DictReader(f)}
+
+
+# Map every agent name to the names it depends on, rejecting unknown names and cycles
+def resolve_dependencies(agent_data: List[Dict]) -> Dict[str, List[str]]:
+    names = [data["name"] for data in agent_data]
+    if len(set(names)) != len(names):
+        raise ValueError("Agent names must be unique to schedule their tasks.")
+
+    dependencies = {data["name"]: list(data.get("depends_on", [])) for data in agent_data}
+    for name, deps in dependencies.items():
+        unknown = [dep for dep in deps if dep not in dependencies]
+        if unknown:
+            raise ValueError(f"Agent '{name}' depends on unknown agents: {', '.join(unknown)}")
+
+    # Kahn's algorithm: anything left over sits on a cycle
+    remaining = {name: set(deps) for name, deps in dependencies.items()}
+    while True:
+        ready = [name for name, deps in remaining.items() if not deps]
+        if not ready:
+            break
+        for name in ready:
+            del remaining[name]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    if remaining:
+        raise ValueError(f"Circular task dependencies between: {', '.join(sorted(remaining))}")
+
+    return dependencies
+
+
+# Run one task per agent spec, starting each as soon as its dependencies have finished.
+# `run_task(data, upstream)` receives the spec and the outputs of the agents it depends on.
+# Tasks raising `Cancelled` are left out of the results, as are the agents depending on them.
+# Once `cancel` is cancelled or past its deadline no new tasks start and the outputs finished
+# so far are returned right away; running tasks stop at their next cancellation check.
+def run_task_graph(agent_data: List[Dict], run_task: Callable[[Dict, Dict[str, Any]], Any],
+                   max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                   cancel: Optional[CancelToken] = None) -> Dict[str, Any]:
+    if max_concurrency < 1:
+        raise ValueError("max_concurrency must be at least 1.")
+
+    dependencies = resolve_dependencies(agent_data)
+    specs = {data["name"]: data for data in agent_data}
+    results = {}
+    stopped = set()
+    running = {}
+    pending = [data["name"] for data in agent_data]
+
+    executor = ThreadPoolExecutor(max_workers=max_concurrency)
+    try:
+        while pending or running:
+            if cancel is not None and cancel.stop_reason is not None:
+                break
+            # Agents waiting on a stopped agent can never start
+            blocked = [n for n in pending if any(dep in stopped for dep in dependencies[n])]
+            while blocked:
+                stopped.update(blocked)
+                pending = [n for n in pending if n not in stopped]
+                blocked = [n for n in pending if any(dep in stopped for dep in dependencies[n])]
+
+            # Submit everything whose inputs are available, in spec order
+            for name in [n for n in pending if all(dep in results for dep in dependencies[n])]:
+                upstream = {dep: results[dep] for dep in dependencies[name]}
+                # Tasks run in a copy of the caller's context so tracing spans nest under the run
+                context = contextvars.copy_context()
+                running[executor.submit(context.run, run_task, specs[name], upstream)] = name
+                pending.remove(name)
+            if not running:
+                break
+
+            # Wake up now and then to notice an explicit cancel(), not only the deadline
+            timeout = None
+            if cancel is not None:
+                remaining = cancel.remaining()
+                timeout = CANCEL_POLL_SECONDS if remaining is None else max(min(remaining, CANCEL_POLL_SECONDS), 0)
+            done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = running.pop(future)
+                try:
+                    results[name] = future.result()
+                except Cancelled:
+                    stopped.add(name)
+    finally:
+        # Without waiting for tasks that are still winding down after a cancellation
+        executor.shutdown(wait=not running, cancel_futures=True)
+
+    return results
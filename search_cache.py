@@ -0,0 +1,141 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import contextvars
+import hashlib
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from crewai.tools import BaseTool
+from pydantic import BaseModel, Field
+
+from result_cache import ResultCache
+from tracing import span
+
+# Web search results shared by every agent of a run, and kept on disk for later runs
+SEARCH_CACHE_PATH = os.path.join(".cache", "search_results.sqlite3")
+SEARCH_TTL_SECONDS = 24 * 60 * 60
+SEARCH_MAX_ENTRIES = 2000
+SEARCH_MAX_BYTES = 20 * 1024 * 1024
+PREFETCH_WORKERS = 4
+MAX_PREFETCH_QUERIES = 5
+
+
+# Case, punctuation and spacing don't change what a search engine returns
+def normalize_query(query: str) -> str:
+    return " ".join(re.sub(r"[^\w\s]", " ", query.casefold()).split())
+
+
+def search_cache_key(query: str) -> str:
+    return hashlib.sha256(f"search:{normalize_query(query)}".encode("utf-8")).hexdigest()
+
+
+def open_search_cache(path: str = SEARCH_CACHE_PATH) -> ResultCache:
+    return ResultCache(path, max_entries=SEARCH_MAX_ENTRIES, max_bytes=SEARCH_MAX_BYTES, ttl_seconds=SEARCH_TTL_SECONDS)
+
+
+# Queries every crew ends up running for a business, derived from its "Business:" and
+# "Challenges:" lines (or the first sentence of free-form context)
+def standard_queries(business_context: str) -> List[str]:
+    fields = dict(re.findall(r"^\s*(Business|Challenges):\s*(.+)$", business_context, re.MULTILINE))
+    business = fields.get("Business") or business_context.strip()
+    business = re.split(r"(?<=[.!?])\s", business.strip(), maxsplit=1)[0].rstrip(".!?")
+    business = business.split(":", 1)[-1].strip()  # "Sweet Creations: An online bakery..." -> "An online bakery..."
+    if not business:
+        return []
+    queries = [f"{business} market trends", f"{business} competitors", f"{business} digital marketing strategies"]
+    challenges = re.split(r"(?<=[.!?])\s", fields.get("Challenges", "").strip(), maxsplit=1)[0].rstrip(".!?")
+    if challenges:
+        queries.append(f"{challenges} solutions for small businesses")
+    return queries[:MAX_PREFETCH_QUERIES]
+
+
+# Search layer for one run: identical (normalized) queries from any agent reach the backend
+# once, concurrent callers wait for the request already in flight, and results persist in
+# `cache` across runs. Failed searches are not remembered, so a later call retries.
+class RunSearch:
+    def __init__(self, search: Callable[[str], str], cache: Optional[ResultCache] = None):
+        self._search = search
+        self.cache = cache
+        self.backend_calls = 0
+        self.shared = 0
+        self._results = {}
+        self._lock = threading.Lock()
+
+    def search(self, query: str) -> str:
+        key = normalize_query(query)
+        with self._lock:
+            future = self._results.get(key)
+            owner = future is None
+            if owner:
+                future = self._results[key] = Future()
+            else:
+                self.shared += 1
+        if owner:
+            try:
+                future.set_result(self._fetch(query))
+            except Exception as e:
+                with self._lock:
+                    self._results.pop(key, None)
+                future.set_exception(e)
+        return future.result()
+
+    def _fetch(self, query: str) -> str:
+        with span("search", "tool", query=normalize_query(query)) as record:
+            cached = self.cache.get(search_cache_key(query)) if self.cache is not None else None
+            record["attrs"]["cached"] = cached is not None
+            if cached is not None:
+                return cached
+            with self._lock:
+                self.backend_calls += 1
+            result = self._search(query)
+            if self.cache is not None:
+                self.cache.set(search_cache_key(query), result)
+            return result
+
+    # Start searching in the background; agents asking for the same queries wait for these results
+    def prefetch(self, queries: List[str]) -> None:
+        if not queries:
+            return
+        executor = ThreadPoolExecutor(max_workers=min(PREFETCH_WORKERS, len(queries)), thread_name_prefix="search")
+        for query in queries:
+            executor.submit(contextvars.copy_context().run, self._prefetch_one, query)
+        executor.shutdown(wait=False)
+
+    def _prefetch_one(self, query: str) -> None:
+        try:
+            self.search(query)
+        except Exception:
+            pass  # the agent that needs this query searches again
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"queries": len(self._results), "backend_calls": self.backend_calls, "shared": self.shared}
+
+
+# Wrap a crewAI search tool (e.g. SerperDevTool) as a plain `search(query) -> str` backend
+def tool_backend(tool: Any) -> Callable[[str], str]:
+    return lambda query: str(tool.run(search_query=query))
+
+
+class SearchInput(BaseModel):
+    search_query: str = Field(..., description="Query to search the web for")
+
+
+# Search tool given to every agent of a run, answering from the run's shared search layer
+class SharedSearchTool(BaseTool):
+    name: str = "Search the internet"
+    description: str = "Searches the internet and returns the top results for a query."
+    args_schema: Type[BaseModel] = SearchInput
+    run_search: Any = None
+
+    def _run(self, search_query: str) -> str:
+        return self.run_search.search(search_query)
+
+
+# Tool for one run, with the prefetched queries listed so agents can reuse them verbatim
+def shared_search_tool(run_search: RunSearch, prefetched: List[str]) -> SharedSearchTool:
+    description = SharedSearchTool.model_fields["description"].default
+    if prefetched:
+        description += " Results for these queries are already available: " + "; ".join(prefetched) + "."
+    return SharedSearchTool(run_search=run_search, description=description)
@@ -0,0 +1,149 @@
+from contextlib import contextmanager
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from result_cache import normalize_context
+
+INDEX_PATH = os.path.join(".cache", "similar_runs.faiss")
+DB_PATH = os.path.join(".cache", "similar_runs.sqlite3")
+MAX_RUNS = 5000
+
+# Cosine similarity above which a past result is served without asking, and above which it is offered
+SERVE_THRESHOLD = 0.97
+OFFER_THRESHOLD = 0.90
+# Runs this similar to one already indexed (e.g. served from the result cache) are not added again
+DUPLICATE_THRESHOLD = 0.999
+# Neighbours fetched per lookup before filtering to the same crew
+SEARCH_K = 10
+
+
+# Figures in a context (amounts, counts, dates), ignoring thousands separators: "€2,000" -> "2000"
+def context_numbers(business_context: str) -> List[str]:
+    return sorted(number.replace(",", "") for number in re.findall(r"\d[\d,]*(?:\.\d+)?", business_context))
+
+
+def budget_line(business_context: str) -> Optional[str]:
+    match = re.search(r"^\s*Budget:\s*(.+)$", business_context, re.MULTILINE | re.IGNORECASE)
+    return normalize_context(match.group(1)) if match else None
+
+
+# Embeddings barely move when only a budget or a figure changes; a past answer is only reused
+# as is when the budget line and every number in the context are exactly the same
+def facts_match(business_context: str, previous_context: str) -> bool:
+    return (budget_line(business_context) == budget_line(previous_context)
+            and context_numbers(business_context) == context_numbers(previous_context))
+
+
+# Identifies a crew setup; only runs of the same crew and models are considered duplicates
+def crew_key(agent_data: List[Dict], model: str) -> str:
+    payload = json.dumps({"agents": agent_data, "model": model}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+# faiss index over embeddings of past business contexts, with their results in SQLite.
+# Vectors are L2-normalised, so inner product equals cosine similarity.
+class SimilarRunIndex:
+    def __init__(self, index_path: str = INDEX_PATH, db_path: str = DB_PATH, max_runs: int = MAX_RUNS):
+        import faiss
+        from chromadb.utils.embedding_functions import DefaultEmbeddingFunction
+
+        self._faiss = faiss
+        self._embed = DefaultEmbeddingFunction()
+        self.index_path = index_path
+        self.db_path = db_path
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        for path in (index_path, db_path):
+            if os.path.dirname(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS runs ("
+                " id INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " crew TEXT NOT NULL,"
+                " context TEXT NOT NULL,"
+                " results TEXT NOT NULL,"
+                " created_at REAL NOT NULL)"
+            )
+        self._index = faiss.read_index(index_path) if os.path.exists(index_path) else None
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+    def _vector(self, business_context: str):
+        import numpy as np
+
+        vector = np.asarray(self._embed([normalize_context(business_context)]), dtype="float32")
+        self._faiss.normalize_L2(vector)
+        return vector
+
+    # Closest past run of the same crew, with its cosine similarity, or None
+    def lookup(self, business_context: str, crew: str, threshold: float = OFFER_THRESHOLD) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return None  # nothing to match yet; skip embedding the context
+        return self._search(self._vector(business_context), crew, threshold)
+
+    def _search(self, vector, crew: str, threshold: float) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return None
+            scores, ids = self._index.search(vector, min(SEARCH_K, self._index.ntotal))
+        candidates = [(float(score), int(run_id)) for score, run_id in zip(scores[0], ids[0])
+                      if run_id != -1 and score >= threshold]
+        if not candidates:
+            return None
+        with self._connect() as conn:
+            for score, run_id in candidates:
+                row = conn.execute("SELECT context, results FROM runs WHERE id = ? AND crew = ?",
+                                   (run_id, crew)).fetchone()
+                if row is not None:
+                    return {"similarity": score, "context": row[0], "results": json.loads(row[1])}
+        return None
+
+    # Add a finished run; the oldest runs are dropped beyond `max_runs`
+    def add(self, business_context: str, crew: str, results: List[Dict[str, str]]) -> None:
+        import numpy as np
+
+        vector = self._vector(business_context)
+        if self._search(vector, crew, DUPLICATE_THRESHOLD) is not None:
+            return
+        with self._lock:
+            with self._connect() as conn:
+                run_id = conn.execute("INSERT INTO runs (crew, context, results, created_at) VALUES (?, ?, ?, ?)",
+                                      (crew, business_context, json.dumps(results, ensure_ascii=False),
+                                       time.time())).lastrowid
+                stale = [row[0] for row in conn.execute(
+                    "SELECT id FROM runs ORDER BY id DESC LIMIT -1 OFFSET ?", (self.max_runs,)).fetchall()]
+                conn.executemany("DELETE FROM runs WHERE id = ?", [(stale_id,) for stale_id in stale])
+            if self._index is None:
+                self._index = self._faiss.IndexIDMap2(self._faiss.IndexFlatIP(vector.shape[1]))
+            self._index.add_with_ids(vector, np.asarray([run_id], dtype="int64"))
+            if stale:
+                self._index.remove_ids(np.asarray(stale, dtype="int64"))
+            self._faiss.write_index(self._index, self.index_path)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"runs": self._index.ntotal if self._index is not None else 0}
+
+
+# The index when faiss and chromadb's embedding function are available, or None: similar-run
+# answers are an optimization and runs go ahead without them
+def open_similar_runs() -> Optional[SimilarRunIndex]:
+    try:
+        return SimilarRunIndex()
+    except Exception:
+        return None
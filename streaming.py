@@ -0,0 +1,42 @@
+import queue
+import time
+from typing import Any, Dict, List
+
+# Longest step text forwarded to the UI; full outputs arrive with the "finished" event
+MAX_STEP_TEXT = 500
+
+
+# Thread-safe channel carrying per-agent progress from crew workers to the UI thread
+class RunEvents:
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def emit(self, agent: str, kind: str, text: str = "") -> None:
+        self._queue.put({"agent": agent, "type": kind, "text": text, "time": time.time()})
+
+    # Return everything emitted since the last call without blocking
+    def drain(self) -> List[Dict[str, Any]]:
+        events = []
+        while True:
+            try:
+                events.append(self._queue.get_nowait())
+            except queue.Empty:
+                return events
+
+
+# Turn a crewAI step callback payload into a short human-readable line
+def describe_step(step: Any) -> str:
+    # Older crewAI versions pass a list of (AgentAction, observation) tuples
+    if isinstance(step, list):
+        return "\n".join(describe_step(item[0] if isinstance(item, tuple) else item) for item in step)
+
+    tool = getattr(step, "tool", None)
+    if tool:
+        text = f"Using tool {tool}: {getattr(step, 'tool_input', '')}"
+    else:
+        text = (getattr(step, "thought", None) or getattr(step, "output", None)
+                or getattr(step, "result", None) or getattr(step, "log", None) or str(step))
+    text = str(text).strip()
+    if len(text) > MAX_STEP_TEXT:
+        text = text[:MAX_STEP_TEXT] + "..."
+    return text
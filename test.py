@@ -1,23 +1,11 @@
 # Import necessary libraries
-from groq import Groq
 import streamlit as st
-from langchain_groq import ChatGroq
-from crewai import Crew, Agent, Task, Process
-from crewai_tools import (
-    DirectoryReadTool,
-    FileReadTool,
-    SerperDevTool,
-    WebsiteSearchTool
-)
-import pandas as pd
 import csv
 import os
-from fpdf import FPDF
 import time
 import threading
 import random
-from fpdf import FPDF, HTMLMixin
-import markdown2
+import uuid
 
 # List of examples
 examples = [
@@ -39,8 +27,17 @@ selected_examples = random.sample(examples, 3)
 # Load API key from secrets
 serper_api_key = st.secrets["SERPER_API_KEY"]
 os.environ["SERPER_API_KEY"] = serper_api_key  # serper.dev API key
-search_tool = SerperDevTool()
-web_rag_tool = WebsiteSearchTool()
+
+# The agent framework and LLM clients are loaded once per process, when a run starts,
+# so sidebar and text-area reruns don't pay for them
+@st.cache_resource
+def load_groq_llm():
+    from consulting import create_clients
+    groq_api_key = st.secrets["GROQ_API_KEY"]
+    # GROQ_LLM = create_clients(groq_api_key, model="groq/llama-3.1-70b-versatile")[1]
+    # GROQ_LLM = create_clients(groq_api_key, model="groq/llama3-groq-70b-8192-tool-use-preview")[1]
+    # crewAI's LLM keeps the key and goes through the shared rate-limited client (a ChatGroq would lose both)
+    return create_clients(groq_api_key, model="groq/llama-3.1-8b-instant")
 
 # Set page configuration
 st.set_page_config(page_title="effiweb solutions Consulting Tool", layout="wide")
@@ -84,13 +81,6 @@ with st.sidebar:
 # Title for the app
 st.title("effiweb solutions Consulting Tool")
 
-# API Key setup
-groq_api_key = st.secrets["GROQ_API_KEY"]
-client = Groq(api_key=groq_api_key)
-# GROQ_LLM = ChatGroq(api_key=groq_api_key, model="llama-3.1-70b-versatile")
-# GROQ_LLM = ChatGroq(api_key=groq_api_key, model="llama3-groq-70b-8192-tool-use-preview")
-GROQ_LLM = ChatGroq(api_key=groq_api_key, model="llama-3.1-8b-instant")
-
 # Input: Business context and challenges
 business_context = st.text_area('Please tell us about **your Business, your Challenges, and your Budget**:', 
                                 value=st.session_state.get('business_context', ''), 
@@ -190,6 +180,10 @@ def check_for_additional_input(agent, task_description):
 
 # Create click button
 if st.button('Start'):
+    from crewai import Crew, Agent, Task, Process
+    from report import build_report, REPORT_FILE_NAME
+    from memory_store import crew_memory
+    client, GROQ_LLM = load_groq_llm()
     agentlist, tasklist_full = [], []
     
     for i in range(number_of_agents):
@@ -212,48 +206,20 @@ if st.button('Start'):
             tasklist_full.append(Task(description=task_description, expected_output=outputlist[i], agent=agent))
     
     if tasklist_full:  # Proceed if all tasks have sufficient information
-        crew = Crew(agents=agentlist, tasks=tasklist_full, verbose=True, process=Process.sequential, full_output=True)
+        # Memory lives in a bounded store, namespaced so sessions never read each other's memories
+        memory_session = st.session_state.setdefault('memory_session', uuid.uuid4().hex)
+        crew = Crew(agents=agentlist, tasks=tasklist_full, verbose=True, process=Process.sequential, full_output=True,
+                    **crew_memory(memory_session))
         results = crew.kickoff()
 
-    # Generate PDF report with header, footer, and professional formatting
-    class PDF(FPDF, HTMLMixin):
-        def header(self):
-            self.set_font("Arial", 'B', 14)
-            self.cell(0, 10, "effiweb Solutions Consulting Report", 0, 1, 'C', link="https://effiweb.solutions")
-            self.ln(5)
-
-        def footer(self):
-            self.set_y(-15)
-            self.set_font("Arial", 'I', 8)
-            self.cell(0, 10, f'Page {self.page_no()}', 0, 0, 'C')
-
-    # Convert Markdown to HTML
-    def markdown_to_html(markdown_content):
-        return markdown2.markdown(markdown_content)
-
-    # Generate PDF
-    pdf = PDF()
-    pdf.add_page()
+    # Generate the PDF report in memory so concurrent sessions never share a file
+    report = build_report(
+        [{"name": namelist[i], "role": rolelist[i]} for i in range(len(tasklist_full))],
+        {namelist[i]: tasklist_full[i].output.raw for i in range(len(tasklist_full))},
+    )
 
-    def add_multiline_text(pdf, title, text):
-        pdf.set_font("Arial", 'B', 12)
-        pdf.cell(0, 10, title, 0, 1, 'L')
-        pdf.ln(5)
-        html_content = markdown_to_html(text)
-        pdf.write_html(html_content)
-
-    # Example usage
-    for i in range(number_of_agents):
-        add_multiline_text(pdf, f"Agent {i+1} - {updated_data[i]['role']}", "")
-        add_multiline_text(pdf, "Proposed Solution", tasklist_full[i].output.raw)
-
-    # Save the PDF
-    pdf_file = "effiweb.solutions_free_consulting_report.pdf"
-    pdf.output(pdf_file)
-    
     # Provide a download link
-    with open(pdf_file, "rb") as f:
-        st.download_button("Download Detailed Report", f, file_name=pdf_file)
+    st.download_button("Download Detailed Report", report, file_name=REPORT_FILE_NAME, mime="application/pdf")
 else:
     st.write('Click "Start" to generate results.')
 
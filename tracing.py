@@ -0,0 +1,190 @@
+from collections import defaultdict, deque
+from contextlib import contextmanager
+import contextvars
+import json
+import os
+import threading
+import time
+import uuid
+from typing import Any, Dict, Iterator, List, Optional
+
+# Finished traces are written here as JSON, one file per run (set to "" to disable)
+TRACE_DIR = os.environ.get("CREW_TRACE_DIR", os.path.join(".cache", "traces"))
+MAX_TRACE_FILES = 200
+# Number of recent runs the in-process percentiles are computed over
+METRICS_WINDOW = 500
+
+_current_trace = contextvars.ContextVar("current_trace", default=None)
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+# All spans recorded for one consulting run
+class Trace:
+    def __init__(self, name: str):
+        self.id = uuid.uuid4().hex
+        self.name = name
+        self.spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span: Dict[str, Any]) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    # Per-agent durations, LLM/tool call counts and token usage, plus run totals
+    def summary(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = list(self.spans)
+        by_id = {span["id"]: span for span in spans}
+
+        def owning_agent(span: Dict[str, Any]) -> Optional[str]:
+            while span is not None:
+                if span["kind"] == "agent":
+                    return span["attrs"].get("agent")
+                span = by_id.get(span["parent_id"])
+            return None
+
+        agents = defaultdict(lambda: {"duration_ms": 0.0, "llm_calls": 0, "tool_calls": 0, "tokens": 0})
+        totals = {"duration_ms": 0.0, "llm_calls": 0, "tool_calls": 0, "tokens": 0}
+        models = defaultdict(lambda: {"llm_calls": 0, "tokens": 0})
+        for span in spans:
+            if span["kind"] == "run":
+                totals["duration_ms"] = max(totals["duration_ms"], span["duration_ms"])
+                continue
+            agent = owning_agent(span)
+            if span["kind"] == "agent" and agent:
+                agents[agent]["duration_ms"] += span["duration_ms"]
+            for counters in [totals] + ([agents[agent]] if agent else []):
+                if span["kind"] == "llm":
+                    counters["llm_calls"] += 1
+                    counters["tokens"] += span["attrs"].get("total_tokens", 0)
+                elif span["kind"] == "tool":
+                    counters["tool_calls"] += 1
+            if span["kind"] == "llm" and span["attrs"].get("model"):
+                models[span["attrs"]["model"]]["llm_calls"] += 1
+                models[span["attrs"]["model"]]["tokens"] += span["attrs"].get("total_tokens", 0)
+        return {"totals": totals, "agents": dict(agents), "models": dict(models)}
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span["start"])
+        return {"trace_id": self.id, "name": self.name, "spans": spans, "summary": self.summary()}
+
+
+# Time a block as a span of the active trace; a no-op outside of a trace
+@contextmanager
+def span(name: str, kind: str = "internal", **attrs) -> Iterator[Dict[str, Any]]:
+    trace = _current_trace.get()
+    record = {"id": uuid.uuid4().hex[:16], "parent_id": _current_span.get(), "name": name, "kind": kind,
+              "attrs": attrs, "start": time.time(), "duration_ms": 0.0, "status": "ok"}
+    if trace is None:
+        yield record
+        return
+    token = _current_span.set(record["id"])
+    started = time.perf_counter()
+    try:
+        yield record
+    except BaseException as e:
+        record["status"] = "error"
+        record["attrs"]["error"] = str(e)
+        raise
+    finally:
+        record["duration_ms"] = round((time.perf_counter() - started) * 1000, 3)
+        _current_span.reset(token)
+        trace.add(record)
+
+
+# Record something that happened without a measurable duration (e.g. a tool step reported by a callback)
+def event(name: str, kind: str = "event", **attrs) -> None:
+    with span(name, kind, **attrs):
+        pass
+
+
+# Start a trace for one run; nested calls reuse the outer trace so the caller can own it.
+# On exit the trace is exported as JSON and folded into the process-wide metrics.
+@contextmanager
+def start_trace(name: str, **attrs) -> Iterator[Trace]:
+    trace = _current_trace.get()
+    if trace is not None:
+        with span(name, "run", **attrs):
+            yield trace
+        return
+    trace = Trace(name)
+    token = _current_trace.set(trace)
+    try:
+        with span(name, "run", **attrs):
+            yield trace
+    finally:
+        _current_trace.reset(token)
+        metrics.record(trace)
+        try:
+            export_trace(trace)
+        except OSError:
+            pass  # tracing must never fail a run
+
+
+def export_trace(trace: Trace, directory: str = TRACE_DIR) -> Optional[str]:
+    if not directory:
+        return None
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"{int(time.time())}-{trace.id}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(trace.to_dict(), f, ensure_ascii=False, indent=2)
+    # Keep only the newest traces
+    files = sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+    for name in files[:-MAX_TRACE_FILES]:
+        os.remove(os.path.join(directory, name))
+    return path
+
+
+def percentile(values: List[float], p: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(p / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+# Aggregated latency percentiles and token counts over recent runs
+class Metrics:
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.window = window
+        self.runs = 0
+        self._run_ms = deque(maxlen=window)
+        self._tokens = deque(maxlen=window)
+        self._agent_ms = defaultdict(lambda: deque(maxlen=window))
+        self._counters = defaultdict(int)
+        self._models = defaultdict(lambda: defaultdict(int))
+        self._lock = threading.Lock()
+
+    def record(self, trace: Trace) -> None:
+        summary = trace.summary()
+        with self._lock:
+            self.runs += 1
+            self._run_ms.append(summary["totals"]["duration_ms"])
+            self._tokens.append(summary["totals"]["tokens"])
+            self._counters["llm_calls"] += summary["totals"]["llm_calls"]
+            self._counters["tool_calls"] += summary["totals"]["tool_calls"]
+            self._counters["tokens"] += summary["totals"]["tokens"]
+            for agent, counters in summary["agents"].items():
+                self._agent_ms[agent].append(counters["duration_ms"])
+            for model, counters in summary["models"].items():
+                for name, value in counters.items():
+                    self._models[model][name] += value
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            def stats(values):
+                values = list(values)
+                return {"p50": percentile(values, 50), "p95": percentile(values, 95)}
+            return {
+                "runs": self.runs,
+                "run_latency_ms": stats(self._run_ms),
+                "tokens_per_run": stats(self._tokens),
+                "agent_latency_ms": {agent: stats(values) for agent, values in self._agent_ms.items()},
+                "models": {model: dict(counters) for model, counters in self._models.items()},
+                **self._counters,
+            }
+
+
+# Process-wide metrics shared by the app, the batch runner and benchmarks
+metrics = Metrics()